@@ -1,7 +1,292 @@
-import pandas as pd
-import numpy as np
+import datetime
+import glob
+import json
 import os
+import re
 import time
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Rows must match every include rule and no exclude rule. A rule tests one
+# column, compared stripped and lowercased, against a list of values, a list of
+# prefixes or a regular expression.
+DEFAULT_RULES = [
+    {"action": "include", "column": "Status", "values": ["connected"]},
+    # Port-channels, loopbacks, SVIs and NVE interfaces are not physical ports
+    {"action": "exclude", "column": "Port", "prefix": ["po", "lo", "vlan", "nve"]},
+    {"action": "exclude", "column": "Speed", "regex": "auto"},
+]
+
+# Summary sheet name -> columns to count the matching ports by, per switch
+DEFAULT_REPORTS = {
+    "Speed Summary": ["Speed"],
+    "Type Summary": ["Type"],
+}
+
+def compile_rules(rules):
+    """Compile filter rules into one function that returns a boolean row mask.
+
+    Every column a rule refers to is normalized once, and each rule becomes a
+    vectorized test on it, so a whole fleet's stacked ports are filtered in one
+    pass. The returned function has a columns attribute naming the columns it needs.
+    Raises ValueError for a malformed rule, so bad rules fail before any
+    sheets are read.
+    """
+    compiled = []
+    for rule in rules:
+        if "column" not in rule:
+            raise ValueError(f"Rule {rule} has no 'column'")
+        action = rule.get("action", "include")
+        if action not in ("include", "exclude"):
+            raise ValueError(f"Unknown rule action {action!r}; expected 'include' or 'exclude'")
+        if "values" in rule:
+            values = [str(value).strip().lower() for value in rule["values"]]
+            test = lambda column, values=values: column.isin(values)
+        elif "prefix" in rule:
+            prefixes = [rule["prefix"]] if isinstance(rule["prefix"], str) else rule["prefix"]
+            pattern = "|".join(re.escape(str(prefix).strip().lower()) for prefix in prefixes)
+            test = lambda column, pattern=pattern: column.str.match(pattern)
+        elif "regex" in rule:
+            try:
+                pattern = re.compile(rule["regex"], re.I)
+            except re.error as e:
+                raise ValueError(f"Rule {rule} has an invalid regex: {e}") from None
+            test = lambda column, pattern=pattern: column.str.contains(pattern, regex=True)
+        else:
+            raise ValueError(f"Rule {rule} needs one of 'values', 'prefix' or 'regex'")
+        compiled.append((action, rule["column"], test))
+
+    columns = {column for _, column, _ in compiled}
+
+    def mask(df):
+        # Rules are evaluated on each column's distinct values and mapped back
+        # to the rows, since a fleet has far fewer distinct values than ports
+        factorized = {}
+        for column in columns:
+            codes, uniques = pd.factorize(df[column].astype(str))
+            factorized[column] = (codes, pd.Series(uniques).str.strip().str.lower())
+        keep = pd.Series(True, index=df.index)
+        for action, column, test in compiled:
+            codes, values = factorized[column]
+            matched = pd.Series(test(values).to_numpy(dtype=bool)[codes], index=df.index)
+            keep &= matched if action == "include" else ~matched
+        return keep
+
+    mask.columns = columns
+    return mask
+
+def load_rules(rules_file):
+    """Read {"rules": [...], "reports": {...}} from a JSON file, either part optional."""
+    with open(rules_file) as f:
+        config = json.load(f)
+    return config.get("rules", DEFAULT_RULES), config.get("reports", DEFAULT_REPORTS)
+
+def with_blank_rows(report):
+    """Insert a blank row between the rows of consecutive switches."""
+    if report.empty:
+        return report
+    # Each row moves down by the number of switches before it
+    switch_number = (report["Switch"] != report["Switch"].shift()).cumsum() - 1
+    positions = pd.RangeIndex(len(report)) + switch_number.to_numpy()
+    spaced = report.set_index(positions).reindex(pd.RangeIndex(len(report) + switch_number.iloc[-1]))
+    return spaced.astype({"Count": "Int64"})
+
+def count_active_ports(all_sheets, rules=None, reports=None):
+    """Count the ports matching the rules per switch, grouped as each report asks.
+
+    Returns {report name: DataFrame} with Switch, the report's columns and
+    Count. All reports are derived from a single group-by over the union of
+    their columns.
+    """
+    mask_of = compile_rules(DEFAULT_RULES if rules is None else rules)
+    reports = DEFAULT_REPORTS if reports is None else reports
+    group_columns = list(dict.fromkeys(column for columns in reports.values() for column in columns))
+
+    # Sheets without the columns the rules test (error sheets, other tabs) are skipped
+    sheets = {sheet: df for sheet, df in all_sheets.items() if mask_of.columns <= set(df.columns)}
+    if not sheets:
+        return {}
+    stacked = pd.concat(sheets, names=["Switch", None]).reset_index(level="Switch")
+    filtered = stacked[mask_of(stacked)].copy()
+    for column in group_columns:
+        if column not in filtered.columns:
+            filtered[column] = None
+    counts = filtered.groupby(["Switch"] + group_columns, sort=False, dropna=False).size()
+
+    results = {}
+    for name, columns in reports.items():
+        # Only switches whose sheet has every column of the report
+        switches = [sheet for sheet, df in sheets.items() if set(columns) <= set(df.columns)]
+        if not switches:
+            continue
+        report = counts.groupby(level=["Switch"] + columns, sort=False, dropna=False).sum().rename("Count").reset_index()
+        results[name] = report[report["Switch"].isin(switches)].reset_index(drop=True)
+    return results
+
+def summarize_active_ports(all_sheets, rules=None, reports=None):
+    """Return count_active_ports laid out for the summary sheets.
+
+    Switches keep their sheet order, counts are largest first within each
+    switch and a blank row separates consecutive switches.
+    """
+    switch_order = {sheet: i for i, sheet in enumerate(all_sheets)}
+    summaries = {}
+    for name, report in count_active_ports(all_sheets, rules, reports).items():
+        order = report["Switch"].map(switch_order)
+        report = report.assign(_order=order).sort_values(["_order", "Count"], ascending=[True, False], kind="stable")
+        summaries[name] = with_blank_rows(report.drop(columns="_order").reset_index(drop=True))
+    return summaries
+
+def write_summaries(summaries, output_file):
+    """Write the summaries to an Excel workbook, one sheet per report."""
+    with pd.ExcelWriter(output_file, engine='xlsxwriter') as writer:
+        for name, summary_df in summaries.items():
+            summary_df.to_excel(writer, sheet_name=name[:31], index=False)
+
+# Per-workbook counts are cached here, keyed by path and modification time
+DEFAULT_CACHE_FILE = os.path.join("int_parsed_outputs", "port_count_cache.json")
+WORKBOOK_PATTERN = "*_show_int_status_parsed_*.xlsx"
+PERIODS = ("day", "week", "month")
+
+def find_workbooks(source):
+    """Return the workbooks named by a file path, a directory or a glob pattern."""
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, WORKBOOK_PATTERN)))
+    if any(char in source for char in "*?["):
+        return sorted(glob.glob(source))
+    return [source]
+
+def workbook_site_and_date(path):
+    """Return (site, date) for a workbook, from its name or else its modification time.
+
+    "stc-switches_show_int_status_parsed_20250517_2.xlsx" -> ("stc-switches", 2025-05-17)
+    """
+    base = os.path.splitext(os.path.basename(path))[0]
+    site = base.split("_show_int_status_parsed")[0] if "_show_int_status_parsed" in base else base.split("_")[0]
+    match = re.search(r"_(\d{8})(?=_|$)", base)
+    if match:
+        try:
+            return site, datetime.datetime.strptime(match.group(1), "%Y%m%d").date()
+        except ValueError:
+            pass
+    return site, datetime.date.fromtimestamp(os.path.getmtime(path))
+
+def period_label(date, period="month"):
+    """Label a date with its day, ISO week or month."""
+    if period == "day":
+        return date.isoformat()
+    if period == "week":
+        year, week, _ = date.isocalendar()
+        return f"{year}-W{week:02d}"
+    return date.strftime("%Y-%m")
+
+def summarize_workbook(path, rules, reports):
+    """Read one workbook and return its count_active_ports results as JSON-ready records."""
+    counts = count_active_ports(pd.read_excel(path, sheet_name=None), rules, reports)
+    return {name: df.astype(object).where(df.notna(), None).to_dict(orient="records") for name, df in counts.items()}
+
+def load_summary_cache(cache_file, rules_key):
+    """Return the cached per-workbook counts, or nothing if they were made with other rules."""
+    if not cache_file or not os.path.exists(cache_file):
+        return {}
+    try:
+        with open(cache_file) as f:
+            cache = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable cache file {cache_file}: {e}")
+        return {}
+    return cache.get("files", {}) if cache.get("rules") == rules_key else {}
+
+def save_summary_cache(cache_file, rules_key, files):
+    """Persist the per-workbook counts for the next run."""
+    if not cache_file:
+        return
+    directory = os.path.dirname(cache_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_file = f"{cache_file}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump({"rules": rules_key, "files": files}, f)
+    os.replace(tmp_file, cache_file)
+
+def aggregate_workbooks(paths, rules=None, reports=None, cache_file=DEFAULT_CACHE_FILE, period="month", workers=4):
+    """Count active ports across many workbooks and roll the counts up by site and period.
+
+    Workbooks are read in parallel processes; each one's per-switch counts are
+    cached by path, modification time and size, so later runs only re-read new
+    or changed files. Returns {sheet name: DataFrame} with, for every report, a
+    Combined sheet (latest workbook of each site, one column per site) and a
+    by Period sheet (latest workbook of each site within each period, summed),
+    plus a Workbooks sheet listing the files used.
+    """
+    rules = DEFAULT_RULES if rules is None else rules
+    reports = DEFAULT_REPORTS if reports is None else reports
+    compile_rules(rules)
+    rules_key = json.dumps({"rules": rules, "reports": reports}, sort_keys=True)
+    cached = load_summary_cache(cache_file, rules_key)
+
+    entries = {}
+    stale = []
+    for path in paths:
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        entry = cached.get(key)
+        if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+            entries[key] = entry
+        else:
+            stale.append((key, stat))
+
+    read = failed = 0
+    if stale:
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(stale)))) as pool:
+            futures = {pool.submit(summarize_workbook, key, rules, reports): (key, stat) for key, stat in stale}
+            for future in as_completed(futures):
+                key, stat = futures[future]
+                try:
+                    entries[key] = {"mtime": stat.st_mtime, "size": stat.st_size, "counts": future.result()}
+                    read += 1
+                except Exception as e:
+                    print(f"Skipping {key}: {e}")
+                    failed += 1
+    print(f"Read {read} workbooks, {len(paths) - len(stale)} unchanged since the last run"
+          + (f", {failed} could not be read" if failed else ""))
+
+    # Keep cache entries for other workbooks that still exist
+    kept = {key: entry for key, entry in cached.items() if key not in entries and os.path.exists(key)}
+    save_summary_cache(cache_file, rules_key, dict(kept, **entries))
+    return rollup_workbooks(entries, reports, period)
+
+def rollup_workbooks(entries, reports, period="month"):
+    """Build the Combined, by Period and Workbooks sheets from per-workbook counts."""
+    rows = []
+    for key, entry in entries.items():
+        site, date = workbook_site_and_date(key)
+        switches = {record["Switch"] for records in entry["counts"].values() for record in records}
+        rows.append({"Workbook": key, "Site": site, "Date": date.isoformat(), "Period": period_label(date, period),
+                     "Switches": len(switches), "Modified": entry["mtime"]})
+    files = pd.DataFrame(rows, columns=["Workbook", "Site", "Date", "Period", "Switches", "Modified"])
+    files = files.sort_values(["Date", "Modified"], kind="stable").reset_index(drop=True)
+    latest = set(files.drop_duplicates("Site", keep="last")["Workbook"])
+    latest_per_period = set(files.drop_duplicates(["Site", "Period"], keep="last")["Workbook"])
+
+    sheets = {}
+    for name, columns in reports.items():
+        frames = [pd.DataFrame(entries[key]["counts"][name]).assign(Workbook=key)
+                  for key in files["Workbook"] if entries[key]["counts"].get(name)]
+        if not frames:
+            continue
+        counts = pd.concat(frames, ignore_index=True).merge(files[["Workbook", "Site", "Period"]], on="Workbook")
+        counts[columns] = counts[columns].fillna("")
+
+        combined = counts[counts["Workbook"].isin(latest)].pivot_table(
+            index=columns, columns="Site", values="Count", aggfunc="sum", fill_value=0)
+        combined["Total"] = combined.sum(axis=1)
+        sheets[f"{name} Combined"] = combined.sort_values("Total", ascending=False).reset_index().rename_axis(columns=None)
+        by_period = counts[counts["Workbook"].isin(latest_per_period)].pivot_table(
+            index=columns, columns="Period", values="Count", aggfunc="sum", fill_value=0)
+        sheets[f"{name} by Period"] = by_period.reset_index().rename_axis(columns=None)
+    sheets["Workbooks"] = files.drop(columns="Modified")
+    return sheets
 
 def main():
     # Create int_parsed_outputs directory if it doesn't exist
@@ -10,7 +295,29 @@ def main():
         os.makedirs(output_dir)
         print(f"Created output directory: {output_dir}")
     
-    input_file = input('Enter the path to the input Excel file: ')
+    input_file = input('Enter the path to the input Excel file, or a directory or glob of workbooks: ').strip()
+    
+    # A directory or glob aggregates many workbooks across sites and time
+    multi = os.path.isdir(input_file) or any(char in input_file for char in "*?[")
+    if multi:
+        workbooks = find_workbooks(input_file)
+        if not workbooks:
+            print(f"No workbooks found for {input_file}")
+            return
+        print(f"Found {len(workbooks)} workbooks.")
+        period = input('Group periods by day, week or month? [month]: ').strip().lower() or "month"
+        if period not in PERIODS:
+            print(f"Unknown period {period}; expected one of {', '.join(PERIODS)}")
+            return
+    
+    # Optional JSON file with custom filter rules and report groupings
+    rules_file = input('Enter the path to a rules JSON file or press Enter for the default filters: ').strip()
+    try:
+        rules, reports = load_rules(rules_file) if rules_file else (DEFAULT_RULES, DEFAULT_REPORTS)
+        compile_rules(rules)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error reading rules file: {e}")
+        return
     
     # Generate output filename with timestamp
     input_filename = os.path.basename(input_file)
@@ -19,7 +326,7 @@ def main():
     # Extract the part before the first underscore
     # For example, from "stc-switches_show_int_status_parsed_20250517" get "stc-switches"
     parts = base.split('_')
-    output_prefix = parts[0]
+    output_prefix = "combined" if multi else parts[0]
     
     current_date = time.strftime("%Y%m%d")
     
@@ -36,107 +343,26 @@ def main():
     
     print(f"Output will be saved to {output_file}")
 
-    try:
-        all_sheets = pd.read_excel(input_file, sheet_name=None)
-    except Exception as e:
-        print(f"Error reading input file: {e}")
-        return
+    if multi:
+        summaries = aggregate_workbooks(workbooks, rules, reports, period=period)
+    else:
+        try:
+            all_sheets = pd.read_excel(input_file, sheet_name=None)
+        except Exception as e:
+            print(f"Error reading input file: {e}")
+            return
 
-    # Prepare lists to hold each sheet's summary DataFrames
-    speed_summaries = []
-    type_summaries = []
-
-    # Keep track of processed sheets to add blank rows between them
-    processed_sheets = 0
-
-    for sheet_name, df in all_sheets.items():
-        if 'Status' in df.columns and 'Speed' in df.columns and 'Name' in df.columns:
-            # Check if Type column exists
-            has_type_column = 'Type' in df.columns
-            
-            # Filter for connected interfaces and create a copy to avoid SettingWithCopyWarning
-            connected = df[df['Status'].astype(str).str.lower() == 'connected'].copy()
-            
-            # Convert names to lowercase for case-insensitive comparison
-            connected.loc[:, 'Name_Lower'] = connected['Name'].astype(str).str.lower().str.strip()
-            connected.loc[:, 'Speed_Lower'] = connected['Speed'].astype(str).str.lower().str.strip()
-            
-            # Create name filter mask
-            name_filter = ~(connected['Name_Lower'].str.startswith('po') | 
-                           connected['Name_Lower'].str.startswith('lo') | 
-                           connected['Name_Lower'].str.startswith('vlan') |
-                           connected['Name_Lower'].str.startswith('nve'))
-            
-            # Calculate how many interfaces were excluded by name
-            name_excluded_count = len(connected) - name_filter.sum()
-            
-            # Create speed filter mask
-            speed_filter = ~connected['Speed_Lower'].str.contains('auto')
-            
-            # Apply both filters
-            combined_filter = name_filter & speed_filter
-            filtered_connected = connected[combined_filter]
-            
-            # Calculate how many interfaces were excluded by speed
-            speed_excluded_count = name_filter.sum() - combined_filter.sum()
-            
-            # Count by Speed
-            speed_counts = filtered_connected['Speed'].value_counts(dropna=False)
-            speed_summary_df = speed_counts.reset_index().rename(
-                columns={'index': 'Speed', 'Speed': 'Count'}
-            )
-            speed_summary_df.insert(0, 'Switch', sheet_name)
-            
-            # Add a blank row after this sheet's data (except for the first sheet)
-            if processed_sheets > 0:
-                # Create a blank row DataFrame with the same columns
-                blank_row = pd.DataFrame([[np.nan, np.nan, np.nan]], 
-                                        columns=['Switch', 'Speed', 'Count'])
-                # Add the blank row before this sheet's data
-                speed_summary_df = pd.concat([blank_row, speed_summary_df], ignore_index=True)
-            
-            speed_summaries.append(speed_summary_df)
-            
-            # Count by Type if the column exists
-            if has_type_column:
-                type_counts = filtered_connected['Type'].value_counts(dropna=False)
-                type_summary_df = type_counts.reset_index().rename(
-                    columns={'index': 'Type', 'Type': 'Count'}
-                )
-                type_summary_df.insert(0, 'Switch', sheet_name)
-                
-                # Add a blank row after this sheet's data (except for the first sheet)
-                if processed_sheets > 0:
-                    # Create a blank row DataFrame with the same columns
-                    blank_row = pd.DataFrame([[np.nan, np.nan, np.nan]], 
-                                            columns=['Switch', 'Type', 'Count'])
-                    # Add the blank row before this sheet's data
-                    type_summary_df = pd.concat([blank_row, type_summary_df], ignore_index=True)
-                
-                type_summaries.append(type_summary_df)
-            
-            processed_sheets += 1
-        else:
-            # Skip sheets without required columns silently
-            pass
+        summaries = summarize_active_ports(all_sheets, rules, reports)
 
     # Check if we have any data to write
-    if not speed_summaries and not type_summaries:
-        print("No valid data found in the input file. Make sure it contains sheets with 'Status', 'Speed', and 'Name' columns.")
+    if not summaries:
+        columns = sorted(compile_rules(rules).columns)
+        print(f"No valid data found in the input file. Make sure it contains sheets with {', '.join(repr(c) for c in columns)} columns.")
         return
 
     # Write all summaries to Excel sheets
     try:
-        with pd.ExcelWriter(output_file, engine='xlsxwriter') as writer:
-            # Combine all speed summaries into a single DataFrame and write to Excel
-            if speed_summaries:
-                combined_speed_df = pd.concat(speed_summaries, ignore_index=True)
-                combined_speed_df.to_excel(writer, sheet_name='Speed Summary', index=False)
-            
-            # Combine all type summaries into a single DataFrame and write to Excel
-            if type_summaries:
-                combined_type_df = pd.concat(type_summaries, ignore_index=True)
-                combined_type_df.to_excel(writer, sheet_name='Type Summary', index=False)
+        write_summaries(summaries, output_file)
         
         # Add a success message with the output file path
         print(f"File processed successfully. Output written to: {output_file}")
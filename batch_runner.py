@@ -0,0 +1,526 @@
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+import pandas as pd
+from active_ports_speed_type_counter import compile_rules, summarize_active_ports, write_summaries
+from cdp_plotter import (build_topology_graph, cdp_output_error, collect_cdp_neighbors, fetch_cdp_output,
+                         parse_cdp_sheet, plot_connections, unique_connections)
+from collector_common import excel_sheet_name, keep_sheet, sheet_error
+from host_health import HostHealth
+from pipeline import run_pipeline
+from scheduler import ConcurrencyLimits, check_limit, dedupe_groups, schedule_hosts, split_limits
+from port_inventory import join_ports, write_port_inventory
+from sharding import (AUTHKEY_ENV, SHARD_BY, SHARD_TIMEOUT, ShardCoordinator, parse_address, run_worker,
+                      split_shards)
+from show_int_status_parser import (collect_interface_status, get_interface_status_via_shell, get_switch_list,
+                                    interface_output_error, parse_interface_sheet)
+
+try:
+    import keyring
+except ImportError:  # keyring is optional; only needed for *_keyring credentials
+    keyring = None
+
+TASKS = ("interfaces", "cdp", "count", "ports")
+FORMATS = ("xlsx", "csv", "json", "html")
+
+DEFAULT_CONFIG = {
+    "name": None,
+    "output_dir": "batch_outputs",
+    "concurrency": 8,
+    "parse_workers": 2,
+    "offline_html": False,
+    "structured": False,
+    "stream_parse": True,
+    "analytics": {},
+    "count": {},
+    "interval": 900,
+    "tasks": ["interfaces", "cdp", "count"],
+    "formats": ["xlsx", "html"],
+    "health_file": "host_health.json",
+    "retry": {},
+    "sharding": {},
+    "limits": {},
+    "inventory": [],
+}
+
+# How each collection kind fetches, parses and recognizes a failed fetch
+COLLECTORS = {
+    "interfaces": (get_interface_status_via_shell, parse_interface_sheet, interface_output_error),
+    "cdp": (fetch_cdp_output, parse_cdp_sheet, cdp_output_error),
+}
+# With "stream_parse" (the default) these parse the table while it arrives and
+# return the switch's sheet, or the "ERROR: ..." output of a failed fetch
+STREAMING_COLLECTORS = {
+    "interfaces": collect_interface_status,
+    "cdp": collect_cdp_neighbors,
+}
+
+
+def load_config(config_file):
+    """Read a JSON batch config and fill in defaults.
+
+    Example:
+        {
+          "name": "campus",
+          "concurrency": 16,
+          "interval": 300,
+          "tasks": ["interfaces", "count"],
+          "formats": ["xlsx", "json"],
+          "structured": true,
+          "count": {"rules": [{"action": "include", "column": "Status", "values": ["connected"]}],
+                    "reports": {"Speed x Type": ["Speed", "Type"], "VLAN Summary": ["Vlan"]}},
+          "analytics": {"enabled": true, "pairs": [["core1", "edge7"]], "exact_limit": 1000, "sample_size": 64},
+          "retry": {"max_attempts": 3, "base_delay": 2, "failure_threshold": 3, "cooldown": 900},
+          "sharding": {"shards": 4, "by": "region", "listen": "0.0.0.0:50000", "local_workers": 2, "timeout": 3600},
+          "limits": {"per_group": 4, "per_site": 2},
+          "inventory": [
+            {"name": "core", "csv": "core.csv", "region": "east", "site": "dc1", "max_sessions": 2,
+             "username": "netops", "password_env": "CORE_PW"},
+            {"name": "access", "csv": "access.csv", "username_env": "ACC_USER",
+             "password_keyring": "network-auto/access"}
+          ]
+        }
+    """
+    with open(config_file) as f:
+        config = dict(DEFAULT_CONFIG, **json.load(f))
+    if not config["name"]:
+        config["name"] = os.path.splitext(os.path.basename(config_file))[0]
+    unknown_tasks = set(config["tasks"]) - set(TASKS)
+    if unknown_tasks:
+        raise ValueError(f"Unknown tasks {sorted(unknown_tasks)}; expected some of {list(TASKS)}")
+    unknown_formats = set(config["formats"]) - set(FORMATS)
+    if unknown_formats:
+        raise ValueError(f"Unknown formats {sorted(unknown_formats)}; expected some of {list(FORMATS)}")
+    if config["count"].get("rules") is not None:
+        compile_rules(config["count"]["rules"])
+    if not config["inventory"]:
+        raise ValueError("The config has no inventory groups")
+    for group in config["inventory"]:
+        if "csv" not in group:
+            raise ValueError(f"Inventory group {group.get('name', '?')} has no 'csv' entry")
+    for name in ("per_group", "per_site"):
+        check_limit(f"limits.{name}", config["limits"].get(name))
+    for group in config["inventory"]:
+        check_limit(f"max_sessions of inventory group {group_name(group)}", group.get("max_sessions"))
+    if config["sharding"].get("by", "hash") not in SHARD_BY:
+        raise ValueError(f"Unknown sharding method {config['sharding']['by']}; expected one of {list(SHARD_BY)}")
+    timeout = config["sharding"].get("timeout", SHARD_TIMEOUT)
+    if not isinstance(timeout, (int, float)) or timeout <= 0:
+        raise ValueError(f"sharding.timeout must be a positive number of seconds, not {timeout!r}")
+    return config
+
+
+def resolve_secret(group, field, username=None):
+    """Resolve a credential field given literally, from the environment or from the keyring."""
+    if field in group:
+        return group[field]
+    if f"{field}_env" in group:
+        value = os.environ.get(group[f"{field}_env"])
+        if value is None:
+            raise ValueError(f"Environment variable {group[f'{field}_env']} is not set")
+        return value
+    if f"{field}_keyring" in group:
+        if keyring is None:
+            raise ValueError("The keyring package is required for *_keyring credentials (pip install keyring)")
+        value = keyring.get_password(group[f"{field}_keyring"], username)
+        if value is None:
+            raise ValueError(f"No keyring entry for {username} in {group[f'{field}_keyring']}")
+        return value
+    raise ValueError(f"Inventory group {group.get('name', group['csv'])} has no {field}, {field}_env or {field}_keyring")
+
+
+def group_name(group):
+    """Name of an inventory group, defaulting to its CSV file name."""
+    return group.get("name", os.path.splitext(os.path.basename(group["csv"]))[0])
+
+
+def group_credentials(config):
+    """Return {group name: (username, password)} for every inventory group."""
+    credentials = {}
+    for group in config["inventory"]:
+        username = resolve_secret(group, "username")
+        credentials[group_name(group)] = (username, resolve_secret(group, "password", username))
+    return credentials
+
+
+def build_inventory(config):
+    """Return [(switch, group name, username, password)] for every inventory group."""
+    credentials = group_credentials(config)
+    groups = []
+    for group in config["inventory"]:
+        switches = get_switch_list(group["csv"])
+        print(f"Found {len(switches)} switches in {group['csv']}.")
+        groups.append((group_name(group), switches))
+    # A switch listed in several groups keeps the first group's credentials
+    switches, switch_group = dedupe_groups(groups)
+    return [(switch, switch_group[switch]) + credentials[switch_group[switch]] for switch in switches]
+
+
+def session_limits(config, switch_group):
+    """Build the per-group and per-site session caps from config["limits"] and the inventory groups."""
+    limits = config["limits"]
+    groups = {group_name(group): group for group in config["inventory"]}
+    site_of = {switch: groups[group]["site"] for switch, group in switch_group.items()
+               if "site" in groups.get(group, {})}
+    group_limits = {name: group["max_sessions"] for name, group in groups.items() if "max_sessions" in group}
+    return ConcurrencyLimits(switch_group, limits.get("per_group"), limits.get("per_site"), site_of, group_limits)
+
+
+class PollState:
+    """Parsed results kept in memory between daemon cycles."""
+
+    def __init__(self):
+        self.interfaces = {}
+        self.cdp = {}
+        self.last_success = {}
+        self.cycles = 0
+
+    def update(self, kind, results):
+        """Store this cycle's results, keeping the last good data for failed hosts.
+
+        Returns the DataFrames for every host, with stale entries for hosts that failed.
+        """
+        store = getattr(self, kind)
+        now = time.time()
+        for switch, df in results.items():
+            if df is not None and "Error" not in df.columns:
+                store[switch] = df
+                self.last_success[switch] = now
+            elif switch not in store and df is not None:
+                store[switch] = df
+        return store
+
+
+def port_status_changes(previous, current):
+    """Return ports whose Status differs between two interface status snapshots."""
+    changes = []
+    for switch, df in current.items():
+        old = previous.get(switch)
+        if old is None or "Port" not in df.columns or "Port" not in old.columns:
+            continue
+        merged = old[["Port", "Status"]].merge(df[["Port", "Status"]], on="Port", suffixes=("_previous", ""))
+        changed = merged[merged["Status_previous"] != merged["Status"]]
+        if not changed.empty:
+            changed = changed.rename(columns={"Status_previous": "Previous Status"})
+            changed.insert(0, "Switch", switch)
+            changes.append(changed)
+    if not changes:
+        return pd.DataFrame(columns=["Switch", "Port", "Previous Status", "Status"])
+    return pd.concat(changes, ignore_index=True)
+
+
+def write_sheets(sheets, output_base, formats, extra_sheets=None):
+    """Write {switch: DataFrame} in each requested format and return the files written."""
+    written = []
+    extra_sheets = extra_sheets or {}
+    if "xlsx" in formats:
+        excel_file = f"{output_base}.xlsx"
+        with pd.ExcelWriter(excel_file, engine="xlsxwriter") as writer:
+            for switch, df in sheets.items():
+                df.to_excel(writer, sheet_name=excel_sheet_name(switch), index=False)
+            for sheet_name, df in extra_sheets.items():
+                df.to_excel(writer, sheet_name=sheet_name, index=False)
+        written.append(excel_file)
+    if "csv" in formats or "json" in formats:
+        frames = [df.assign(Switch=switch) for switch, df in sheets.items()]
+        combined = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        if "csv" in formats:
+            combined.to_csv(f"{output_base}.csv", index=False)
+            written.append(f"{output_base}.csv")
+        if "json" in formats:
+            combined.to_json(f"{output_base}.json", orient="records", indent=2)
+            written.append(f"{output_base}.json")
+    return written
+
+
+def collectors(kind, config):
+    """Return the (fetch, parse, error_of) functions collect_all uses for a kind of output."""
+    fetch, parse, error_of = COLLECTORS[kind]
+    if not config["stream_parse"]:
+        return fetch, parse, error_of
+    return STREAMING_COLLECTORS[kind], functools.partial(keep_sheet, parse), functools.partial(sheet_error, error_of)
+
+
+def collect_all(inventory, fetch, parse, error_of, config, health, limits=None):
+    """Fetch and parse every switch in the inventory through the staged pipeline.
+
+    fetch(switch, username, password, structured) returns raw output and
+    parse(switch, raw) the switch's DataFrame. Switches whose circuit is open
+    are left out. limits defaults to the session caps of the config. With
+    "stream_parse" the fetch threads already parse, so the parse step runs
+    on threads instead of shipping finished sheets through parser processes.
+    """
+    credentials = {switch: (username, password) for switch, _, username, password in inventory}
+    to_poll, skipped = health.partition(list(credentials))
+    for switch in skipped:
+        print(f"Skipping {switch}: {health.describe(switch)}")
+    results = {}
+    # Slowest switches first, groups interleaved, within the session caps
+    switch_group = {switch: group for switch, group, _, _ in inventory}
+    schedule = schedule_hosts(to_poll, switch_group, health)
+    structured = config["structured"]
+    run_pipeline(schedule, lambda switch: fetch(switch, *credentials[switch], structured), parse, results.__setitem__,
+                 error_of, health, config["concurrency"], config["parse_workers"],
+                 use_processes=not config["stream_parse"], limits=limits or session_limits(config, switch_group))
+    # Keep inventory order in the output files
+    return {switch: results[switch] for switch in to_poll}
+
+
+def collect_shard(shard, config, credentials):
+    """Collect one shard on a worker: {"kind", "switches": [(switch, group name)], "health", "failed", "sites", "limits"}.
+
+    The shard carries the coordinator's health entries for its switches so the
+    retry and half-open rules apply as they would locally; the updated entries
+    are returned with the results, along with the switches that have failed
+    this run (see HostHealth.start_run). Its session caps are this shard's share of
+    the configured ones (see split_limits).
+    """
+    fetch, parse, error_of = collectors(shard["kind"], config)
+    health = HostHealth(None, **config["retry"])
+    health.hosts = dict(shard["health"])
+    health.failed_this_run = set(shard["failed"])
+    inventory = [(switch, group) + tuple(credentials[group]) for switch, group in shard["switches"]]
+    group_caps, site_caps = shard["limits"]
+    limits = ConcurrencyLimits(dict(shard["switches"]), site_of=shard["sites"], group_limits=group_caps,
+                               site_limits=site_caps)
+    results = collect_all(inventory, fetch, parse, error_of, config, health, limits)
+    return {"results": results, "health": {switch: health.hosts[switch] for switch, _ in shard["switches"]
+                                           if switch in health.hosts},
+            "failed": sorted(health.failed_this_run)}
+
+
+def shard_worker(address, authkey, config_file):
+    """Worker process: resolve credentials from the config and collect shards until stopped."""
+    config = load_config(config_file)
+    credentials = group_credentials(config)
+    run_worker(address, authkey, lambda shard: collect_shard(shard, config, credentials))
+
+
+def plan_shards(switches, switch_group, config):
+    """Split switches into shards and share the session caps between them.
+
+    Returns (shards, caps, limits): lists of switches, one (group caps, site
+    caps) pair per shard and the configured ConcurrencyLimits.
+    """
+    regions = {group_name(group): group.get("region", group_name(group)) for group in config["inventory"]}
+    sharding = config["sharding"]
+    shards = split_shards([(switch, regions.get(switch_group[switch])) for switch in switches],
+                          sharding.get("shards", 1), sharding.get("by", "hash"))
+    limits = session_limits(config, switch_group)
+    return shards, split_limits(limits, shards), limits
+
+
+def start_coordinator(config, config_file, inventory):
+    """Start the shard queue server and local workers described by config["sharding"].
+
+    Raises ValueError if the session caps cannot be shared between the shards.
+    """
+    # Health can only drop switches from later cycles, so checking the full
+    # inventory covers every cycle
+    switch_group = {switch: group for switch, group, _, _ in inventory}
+    plan_shards(list(switch_group), switch_group, config)
+    sharding = config["sharding"]
+    listen = sharding.get("listen")
+    authkey = os.environ.get(AUTHKEY_ENV)
+    if listen and not authkey:
+        raise ValueError(f"Set {AUTHKEY_ENV} to share a key with remote workers")
+    address = parse_address(listen) if listen else ("127.0.0.1", 0)
+    local_workers = sharding.get("local_workers", 0 if listen else sharding.get("shards", 1))
+    coordinator = ShardCoordinator(address, authkey.encode() if authkey else None, local_workers,
+                                   shard_worker, (config_file,))
+    print(f"Shard coordinator listening on {coordinator.address[0]}:{coordinator.address[1]} "
+          f"with {local_workers} local workers")
+    return coordinator
+
+
+def collect_sharded(inventory, kind, config, health, coordinator):
+    """Like collect_all, but split into shards that the coordinator's workers collect.
+
+    Switches of a shard whose worker failed, died or timed out are reported as
+    fetch errors.
+    """
+    groups = {switch: group for switch, group, _, _ in inventory}
+    to_poll, skipped = health.partition(list(groups))
+    for switch in skipped:
+        print(f"Skipping {switch}: {health.describe(switch)}")
+    # Each shard gets its share of the session caps, so the workers together
+    # stay within them
+    shards, caps, limits = plan_shards(to_poll, groups, config)
+    tasks = [{"kind": kind, "switches": [(switch, groups[switch]) for switch in shard],
+              "health": {switch: health.hosts[switch] for switch in shard if switch in health.hosts},
+              "sites": {switch: limits.bucket(switch)[1] for switch in shard},
+              "failed": [switch for switch in shard if switch in health.failed_this_run],
+              "limits": shard_caps}
+             for shard, shard_caps in zip(shards, caps)]
+    print(f"Collecting {kind} from {len(to_poll)} switches in {len(tasks)} shards")
+    results = {}
+    parse = collectors(kind, config)[1]
+    for task, result in zip(tasks, coordinator.run(tasks, timeout=config["sharding"].get("timeout", SHARD_TIMEOUT))):
+        if "error" in result:
+            print(f"Shard of {len(task['switches'])} switches failed: {result['error']}")
+            for switch, _ in task["switches"]:
+                results[switch] = parse(switch, f"ERROR: shard failed: {result['error']}")
+            continue
+        results.update(result["results"])
+        health.hosts.update(result["health"])
+        health.failed_this_run.update(result["failed"])
+    health.save()
+    # Keep inventory order in the output files
+    return {switch: results[switch] for switch in to_poll if switch in results}
+
+
+def collect(inventory, kind, config, health, coordinator=None):
+    """Collect one kind of output locally, or through the shard workers if a coordinator is running."""
+    if coordinator is not None:
+        return collect_sharded(inventory, kind, config, health, coordinator)
+    fetch, parse, error_of = collectors(kind, config)
+    return collect_all(inventory, fetch, parse, error_of, config, health)
+
+
+def run_cycle(config, inventory, state, health, coordinator=None):
+    """Poll the inventory once, update state and write the configured outputs."""
+    output_dir = config["output_dir"]
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    name = config["name"]
+    tasks = config["tasks"]
+    formats = config["formats"]
+    state.cycles += 1
+    print(f"Cycle {state.cycles}: polling {len(inventory)} switches...")
+    # Interfaces and CDP poll the same switches; a dead one is one failed run
+    health.start_run()
+
+    if "interfaces" in tasks or "count" in tasks or "ports" in tasks:
+        previous = dict(state.interfaces)
+        results = collect(inventory, "interfaces", config, health, coordinator)
+        sheets = state.update("interfaces", results)
+        errors = sum(1 for df in results.values() if "Error" in df.columns)
+        print(f"Collected interface status from {len(results) - errors} switches ({errors} errors)")
+
+        if "interfaces" in tasks:
+            extra = {}
+            if state.cycles > 1:
+                changes = port_status_changes(previous, sheets)
+                print(f"{len(changes)} port status changes since the last cycle")
+                if not changes.empty:
+                    extra["Changes"] = changes
+            output_base = os.path.join(output_dir, f"{name}_show_int_status_parsed_{timestamp}")
+            for written in write_sheets(results, output_base, formats, extra):
+                print(f"Output saved to {written}")
+
+        if "count" in tasks:
+            summaries = summarize_active_ports({excel_sheet_name(switch): df for switch, df in sheets.items()},
+                                               config["count"].get("rules"), config["count"].get("reports"))
+            if summaries:
+                count_file = os.path.join(output_dir, f"{name}_active_physical_intf_count_{timestamp}.xlsx")
+                write_summaries(summaries, count_file)
+                print(f"Output saved to {count_file}")
+
+    if "cdp" in tasks or "ports" in tasks:
+        results = collect(inventory, "cdp", config, health, coordinator)
+        failed = [switch for switch, df in results.items() if df is None]
+        for switch in failed:
+            print(f"Skipping {switch} due to connection error")
+        cdp_sheets = state.update("cdp", {switch: df for switch, df in results.items() if df is not None})
+        neighbor_frames = [df for df in cdp_sheets.values() if "device_id" in df.columns]
+        all_neighbors = pd.concat(neighbor_frames, ignore_index=True) if neighbor_frames else pd.DataFrame()
+        if "cdp" in tasks:
+            extra = {"All_Connections": unique_connections(all_neighbors)} if not all_neighbors.empty else {}
+            G = build_topology_graph(all_neighbors) if not all_neighbors.empty else None
+            analytics = dict(config["analytics"])
+            if G is not None and analytics.pop("enabled", False):
+                from topology_analytics import analyze_topology, write_analytics_json
+                analysis = analyze_topology(G, analytics.pop("pairs", None), **analytics)
+                extra.update({f"Topo_{sheet}"[:31]: df for sheet, df in analysis.items()})
+                if "json" in formats:
+                    analytics_file = os.path.join(output_dir, f"{name}_cdp_analytics_{timestamp}.json")
+                    write_analytics_json(analysis, analytics_file)
+                    print(f"Output saved to {analytics_file}")
+            output_base = os.path.join(output_dir, f"{name}_cdp_neighbors_{timestamp}")
+            for written in write_sheets({s: df for s, df in results.items() if df is not None},
+                                        output_base, [f for f in formats if f != "html"], extra):
+                print(f"Output saved to {written}")
+            if "html" in formats and G is not None:
+                plot_connections(all_neighbors, os.path.join(output_dir, f"{name}_cdp_network_plot_{timestamp}.html"),
+                                 offline=config["offline_html"], G=G)
+
+    if "ports" in tasks:
+        ports, unmatched = join_ports(state.interfaces, all_neighbors)
+        print(f"Port inventory: {len(ports)} ports, {int((ports['Neighbors'] > 0).sum())} with CDP neighbors")
+        output_base = os.path.join(output_dir, f"{name}_port_inventory_{timestamp}")
+        written = write_port_inventory(ports, unmatched, f"{output_base}.xlsx") if "xlsx" in formats else []
+        if "csv" in formats and not any(f.endswith(".csv") for f in written):
+            ports.to_csv(f"{output_base}.csv", index=False)
+            written.append(f"{output_base}.csv")
+        if "json" in formats:
+            ports.to_json(f"{output_base}.json", orient="records", indent=2)
+            written.append(f"{output_base}.json")
+        for output_file in written:
+            print(f"Output saved to {output_file}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the collectors and port counter without prompts, driven by a JSON config.")
+    parser.add_argument("config", help="Path to the JSON batch config")
+    parser.add_argument("--daemon", action="store_true", help="Re-poll on the configured interval until interrupted")
+    parser.add_argument("--interval", type=int, default=None, help="Seconds between cycles, overriding the config")
+    parser.add_argument("--cycles", type=int, default=None, help="Stop the daemon after this many cycles")
+    parser.add_argument("--worker", metavar="HOST:PORT", default=None,
+                        help=f"Collect shards for the coordinator at HOST:PORT (key from {AUTHKEY_ENV}) instead of polling")
+    args = parser.parse_args()
+
+    if args.worker:
+        authkey = os.environ.get(AUTHKEY_ENV)
+        if not authkey:
+            print(f"Set {AUTHKEY_ENV} to the coordinator's key")
+            return 1
+        shard_worker(parse_address(args.worker), authkey.encode(), args.config)
+        return 0
+
+    try:
+        config = load_config(args.config)
+        inventory = build_inventory(config)
+    except KeyError as e:
+        print(f"Error loading config: missing entry {e}")
+        return 1
+    except (OSError, ValueError, TypeError) as e:
+        print(f"Error loading config: {e}")
+        return 1
+
+    interval = args.interval or config["interval"]
+    state = PollState()
+    health = HostHealth(config["health_file"], **config["retry"])
+    coordinator = None
+    if config["sharding"].get("shards"):
+        try:
+            coordinator = start_coordinator(config, args.config, inventory)
+        except ValueError as e:
+            print(f"Error starting shard coordinator: {e}")
+            return 1
+    try:
+        while True:
+            started = time.monotonic()
+            try:
+                run_cycle(config, inventory, state, health, coordinator)
+            except Exception as e:
+                if not args.daemon:
+                    raise
+                # One bad cycle (a parse error, a full disk) must not end unattended polling
+                print(f"Cycle {state.cycles} failed: {type(e).__name__}: {e}")
+            if not args.daemon or (args.cycles and state.cycles >= args.cycles):
+                break
+            wait = max(0, interval - (time.monotonic() - started))
+            print(f"Next cycle in {wait:.0f} seconds")
+            time.sleep(wait)
+    except KeyboardInterrupt:
+        print("Stopped.")
+    finally:
+        if coordinator is not None:
+            coordinator.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import synthetic_outputs
+from active_ports_speed_type_counter import summarize_active_ports
+from cdp_plotter import get_cdp_neighbors, parse_cdp_output, plot_connections, ssh_to_switch
+from show_int_status_parser import collect_interface_status, get_interface_status_via_shell, parse_interface_status
+
+DEFAULT_SCALES = [10, 1000, 10000]
+TABLE_SIZES = [48, 480, 5000]
+# Command lines timed in a fresh interpreter by bench_startup
+STARTUP_COMMANDS = {
+    "python": ["-c", "pass"],
+    "network_auto --help": ["network_auto.py", "--help"],
+    "import show_int_status_parser": ["-c", "import show_int_status_parser"],
+    "import cdp_plotter": ["-c", "import cdp_plotter"],
+    "import active_ports_speed_type_counter": ["-c", "import active_ports_speed_type_counter"],
+    "import batch_runner": ["-c", "import batch_runner"],
+}
+
+
+def time_call(func, repeat):
+    """Run func repeat times and return (best seconds, last result)."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def bench_table_sizes(repeat):
+    """Time parse_interface_status on single tables from 48 to 5,000 ports."""
+    results = {}
+    for num_ports in TABLE_SIZES:
+        output = synthetic_outputs.generate_interface_status(num_ports, seed=num_ports)
+        seconds, df = time_call(lambda: parse_interface_status(output), repeat)
+        results[str(num_ports)] = {"seconds": seconds, "rows": len(df)}
+        print(f"  parse_interface_status {num_ports} ports: {seconds:.4f}s")
+    return results
+
+
+def bench_startup(repeat):
+    """Time interpreter startup plus the imports of each entry point, in fresh processes."""
+    results = {}
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name, args in STARTUP_COMMANDS.items():
+        run = lambda: subprocess.run([sys.executable] + args, cwd=here, stdout=subprocess.DEVNULL, check=True)
+        seconds, _ = time_call(run, repeat)
+        results[name] = {"seconds": seconds}
+        print(f"  {name}: {seconds:.3f}s")
+    return results
+
+
+def bench_scale(num_devices, repeat, skip_plot=False):
+    """Time each stage of the tools for a synthetic fleet of num_devices switches."""
+    int_outputs, cdp_outputs = synthetic_outputs.generate_fleet_outputs(num_devices, seed=num_devices)
+    results = {}
+
+    seconds, sheets = time_call(
+        lambda: {host[:31]: parse_interface_status(text) for host, text in int_outputs.items()}, repeat)
+    results["parse_interface_status"] = {"seconds": seconds, "rows": sum(len(df) for df in sheets.values())}
+
+    seconds, frames = time_call(
+        lambda: [parse_cdp_output(text, host) for host, text in cdp_outputs.items()], repeat)
+    all_neighbors = pd.concat(frames, ignore_index=True)
+    results["parse_cdp_output"] = {"seconds": seconds, "rows": len(all_neighbors)}
+
+    seconds, summaries = time_call(lambda: summarize_active_ports(sheets), repeat)
+    results["summarize_active_ports"] = {"seconds": seconds, "rows": len(summaries.get("Speed Summary", []))}
+
+    if not skip_plot:
+        # plot_connections writes a temporary file into the working directory
+        with tempfile.TemporaryDirectory() as tmp:
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    seconds, G = time_call(lambda: plot_connections(all_neighbors, "plot.html"), repeat)
+            finally:
+                os.chdir(cwd)
+        results["plot_connections"] = {"seconds": seconds, "nodes": G.number_of_nodes(), "edges": G.number_of_edges()}
+
+    for name, result in results.items():
+        print(f"  {name} {num_devices} devices: {result['seconds']:.4f}s")
+    return results
+
+
+def collect_cdp(host, username, password):
+    """Collect CDP output the way cdp_plotter.main does for one switch."""
+    client = ssh_to_switch(host, username, password)
+    if not client:
+        return "ERROR: connection failed"
+    try:
+        return get_cdp_neighbors(client, host)
+    finally:
+        client.close()
+
+
+def failed(output):
+    """Whether a collector returned an error, as raw output or as a parsed sheet."""
+    if isinstance(output, str):
+        return output.startswith("ERROR:")
+    return "Error" in output.columns
+
+
+def bench_collectors(num_devices, concurrency, latency, failure_rate):
+    """Time both collectors against a local mock switch farm."""
+    # Imported here so the parser benchmarks do not need paramiko's server side
+    from mock_switch_farm import SwitchFarm, SwitchProfile
+
+    profile = SwitchProfile(latency=latency, jitter=latency / 2, failure_rate=failure_rate,
+                            hang_seconds=5.0, seed=num_devices)
+    results = {}
+    with SwitchFarm(num_devices, profile, base_port=22000, seed=num_devices) as farm:
+        hosts = farm.inventory()
+        collectors = {
+            "get_interface_status_via_shell": get_interface_status_via_shell,
+            # Streams the table through cli_parsers.TableStream while it arrives
+            "collect_interface_status": collect_interface_status,
+            "get_cdp_neighbors": collect_cdp,
+        }
+        for name, collector in collectors.items():
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=concurrency) as pool:
+                outputs = list(pool.map(lambda host: collector(host, profile.username, profile.password), hosts))
+            seconds = time.perf_counter() - start
+            errors = sum(1 for output in outputs if failed(output))
+            results[name] = {"seconds": seconds, "devices": num_devices, "concurrency": concurrency,
+                             "errors": errors, "devices_per_second": num_devices / seconds}
+            print(f"  {name} {num_devices} devices x{concurrency}: {seconds:.2f}s, {errors} errors")
+    return results
+
+
+def compare_results(current, baseline):
+    """Print the change in time per benchmark relative to a previous results file."""
+    print("\nComparison against baseline:")
+    for name, result in current.get("startup", {}).items():
+        old = baseline.get("startup", {}).get(name)
+        if old and old["seconds"]:
+            print(f"  startup {name}: {old['seconds']:.3f}s -> {result['seconds']:.3f}s ({result['seconds'] / old['seconds']:.2f}x)")
+    for scale, stages in current["scales"].items():
+        for name, result in stages.items():
+            old = baseline.get("scales", {}).get(scale, {}).get(name)
+            if old and old["seconds"]:
+                ratio = result["seconds"] / old["seconds"]
+                print(f"  {name} @ {scale}: {old['seconds']:.4f}s -> {result['seconds']:.4f}s ({ratio:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parsers, plotter and port counter on synthetic switch output.")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="Fleet sizes (number of devices) to benchmark")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per benchmark; the best time is kept")
+    parser.add_argument("--skip-plot", action="store_true", help="Skip plot_connections, which dominates large runs")
+    parser.add_argument("--farm", type=int, default=0, help="Also benchmark the collectors against this many mock switches")
+    parser.add_argument("--concurrency", type=int, default=1, help="Parallel sessions for the collector benchmark")
+    parser.add_argument("--latency", type=float, default=0.2, help="Per-command latency of the mock switches")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of mock switch sessions that fail")
+    parser.add_argument("--output", default=None, help="Path of the JSON results file")
+    parser.add_argument("--compare", default=None, help="Previous JSON results file to compare against")
+    args = parser.parse_args()
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "repeat": args.repeat,
+        "startup": {},
+        "table_sizes": {},
+        "scales": {},
+    }
+
+    print("Benchmarking startup time...")
+    results["startup"] = bench_startup(max(args.repeat, 3))
+
+    print("Benchmarking single table sizes...")
+    results["table_sizes"] = bench_table_sizes(args.repeat)
+
+    for num_devices in args.scales:
+        print(f"Benchmarking {num_devices} devices...")
+        results["scales"][str(num_devices)] = bench_scale(num_devices, args.repeat, args.skip_plot)
+
+    if args.farm:
+        print(f"Benchmarking collectors against {args.farm} mock switches...")
+        results["collectors"] = bench_collectors(args.farm, args.concurrency, args.latency, args.failure_rate)
+
+    output_file = args.output or f"benchmark_results_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {output_file}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare_results(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
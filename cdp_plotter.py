@@ -1,32 +1,48 @@
 import csv
+import functools
 import getpass
+import json
 import os
 import re
 import time
 import pandas as pd
-import paramiko
-import networkx as nx
-from pyvis.network import Network
 from collections import defaultdict
+from collector_common import excel_sheet_name, keep_sheet, run_command, sheet_error, split_host_port
+from cli_parsers import NEIGHBOR_COLUMNS, TableStream, json_document, parse_output
+from host_health import HostHealth
+from interface_names import interface_key
+from pipeline import run_pipeline
+from scheduler import ConcurrencyLimits, dedupe_groups, prompt_limits, schedule_hosts
 
 def get_switch_list(csv_file):
     """Read switch hostnames from a CSV file."""
     with open(csv_file, newline='') as f:
-        return [row[0] for row in csv.reader(f) if row]
+        return [row[0].strip() for row in csv.reader(f) if row and row[0].strip()]
+
+def connect_switch(host, username, password):
+    """Establish SSH connection to a switch, raising the connection error."""
+    import paramiko  # Imported on first use to keep startup fast
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    hostname, port = split_host_port(host)
+    client.connect(hostname, port=port, username=username, password=password, look_for_keys=False, allow_agent=False, timeout=10)
+    return client
 
 def ssh_to_switch(host, username, password):
-    """Establish SSH connection to a switch."""
+    """Establish SSH connection to a switch, or print the error and return None."""
     try:
-        client = paramiko.SSHClient()
-        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        client.connect(host, username=username, password=password, look_for_keys=False, allow_agent=False, timeout=10)
-        return client
+        return connect_switch(host, username, password)
     except Exception as e:
         print(f"Error connecting to {host}: {e}")
         return None
 
-def get_cdp_neighbors(client, host):
-    """Get CDP neighbor information from a switch."""
+def get_cdp_neighbors(client, host, structured=False, stream=None):
+    """Get CDP neighbor information from a switch.
+
+    With structured=True the '| json' forms of the CDP and LLDP commands are
+    tried first (NX-OS, EOS); switches that refuse them get the text commands.
+    Every command's output is fed to stream, if given.
+    """
     try:
         shell = client.invoke_shell()
         time.sleep(1)
@@ -36,155 +52,203 @@ def get_cdp_neighbors(client, host):
         time.sleep(1)
         shell.recv(10000)  # Clear after terminal length 0
 
-        shell.send('show cdp neighbor\n')
-        time.sleep(2)
-        output = ""
-        while shell.recv_ready():
-            output += shell.recv(65535).decode(errors='ignore')
-            time.sleep(0.5)
+        if structured:
+            for command in ('show cdp neighbor | json', 'show lldp neighbors | json'):
+                output = run_command(shell, command, stream)
+                if json_document(output) is not None:
+                    return output
+
+        output = run_command(shell, 'show cdp neighbor', stream)
+        
+        # Arista EOS has no CDP, and CDP may be disabled elsewhere; fall back to LLDP
+        if "% Invalid input" in output or "CDP is not enabled" in output:
+            output += run_command(shell, 'show lldp neighbors', stream)
         
         return output
     except Exception as e:
         return f"ERROR: {e}"
 
 def parse_cdp_output(output, source_switch):
-    """Parse the output of 'show cdp neighbor' command."""
-    lines = output.splitlines()
-    
-    # Find the header line
-    header_line_idx = -1
-    header_line = ""
-    for i, line in enumerate(lines):
-        # Check for different variations of the Device ID, Local Interface, and Holdtime headers
-        if ("Device ID" in line or "Device-ID" in line or "Device Id" in line) and \
-           ("Local Intrfce" in line or "Local Interface" in line) and \
-           ("Holdtme" in line or "Hldtme" in line or "Hold Time" in line):
-            header_line_idx = i
-            header_line = line
-            break
-    
-    if header_line_idx == -1:
-        return pd.DataFrame()  # No header found
-    
-    # Get the positions of each column in the header
-    # Check for different variations of the Device ID header
-    if "Device ID" in header_line:
-        device_id_pos = header_line.find("Device ID")
-    elif "Device-ID" in header_line:
-        device_id_pos = header_line.find("Device-ID")
-    elif "Device Id" in header_line:
-        device_id_pos = header_line.find("Device Id")
-    else:
-        device_id_pos = 0  # Default to the beginning of the line if not found
-    
-    # Check for different variations of the Local Interface header
-    if "Local Intrfce" in header_line:
-        local_intrfce_pos = header_line.find("Local Intrfce")
-    elif "Local Interface" in header_line:
-        local_intrfce_pos = header_line.find("Local Interface")
-    else:
-        local_intrfce_pos = header_line.find("Local")  # Fallback to just "Local" if full header not found
-    
-    # Check for different variations of the Holdtime header
-    if "Holdtme" in header_line:
-        holdtme_pos = header_line.find("Holdtme")
-    elif "Hldtme" in header_line:
-        holdtme_pos = header_line.find("Hldtme")
-    elif "Hold Time" in header_line:
-        holdtme_pos = header_line.find("Hold Time")
-    else:
-        holdtme_pos = header_line.find("Hold")  # Fallback to just "Hold" if full header not found
-    capability_pos = header_line.find("Capability")
-    platform_pos = header_line.find("Platform")
-    
-    # Check for different variations of the Port ID header
-    if "Port ID" in header_line:
-        port_id_pos = header_line.find("Port ID")
-    elif "Port Id" in header_line:
-        port_id_pos = header_line.find("Port Id")
+    """Parse the output of 'show cdp neighbor' (or 'show lldp neighbors') from any supported platform."""
+    _, columns, rows = parse_output("neighbors", output, source_switch)
+    return neighbor_frame(columns, rows, source_switch)
+
+def neighbor_frame(columns, rows, source_switch):
+    """Build the neighbors DataFrame of a switch from parsed (columns, rows)."""
+    if not rows:
+        return pd.DataFrame()  # No header or no neighbors found
+    # LLDP tables have no platform (and on EOS no capability) column
+    positions = [columns.index(column) if column in columns else None for column in NEIGHBOR_COLUMNS]
+    neighbors = [[source_switch] + [row[i] if i is not None else '' for i in positions] for row in rows]
+    return pd.DataFrame(neighbors, columns=['source_switch'] + NEIGHBOR_COLUMNS)
+
+def fetch_cdp_output(switch, username, password, structured=False, stream=None):
+    """Return the raw CDP output of a switch.
+
+    Failures, including the SSH connection, are reported as an "ERROR: ..."
+    string so the retry logic sees the real reason (authentication failures
+    are not retried).
+    """
+    try:
+        client = connect_switch(switch, username, password)
+    except Exception as e:
+        return f"ERROR: {e}"
+    try:
+        return get_cdp_neighbors(client, switch, structured, stream)
+    finally:
+        client.close()
+
+def parse_cdp_sheet(switch, raw_output, stream=None):
+    """Turn raw CDP output into the DataFrame written as the switch's sheet.
+
+    Failed fetches, including SSH connection errors, give a sheet with an
+    'Error' column; None is passed through. Parsed neighbor rows carry a
+    'device_id' column. Rows already parsed by a stream fed during collection
+    are used as they are.
+    """
+    if raw_output is None:
+        return None
+    if raw_output.startswith("ERROR:"):
+        return pd.DataFrame([[raw_output]], columns=["Error"])
+    if stream is not None:
+        _, columns, rows = stream.close(raw_output)
+        df = neighbor_frame(columns, rows, switch)
     else:
-        port_id_pos = header_line.find("Port")  # Fallback to just "Port" if full header not found
-    
-    # Process the data lines
-    neighbors = []
-    current_device_id = None
-    i = header_line_idx + 1
-    
-    while i < len(lines):
-        line = lines[i]
-        
-        # Skip empty lines or lines with switch prompts
-        if not line.strip() or re.match(r"^\S+#", line):
-            i += 1
-            continue
-        
-        # Skip separator lines
-        if re.match(r"^-+$", line.strip()):
-            i += 1
-            continue
-        
-        # Check if this is a device ID line (not indented and not containing interface info)
-        if not line.startswith(' ') and "Local Intrfce" not in line:
-            current_device_id = line.strip()
-            i += 1
-            continue
-        
-        # This is a data line (indented, contains interface and other details)
-        if current_device_id and line.startswith(' '):
-            # Find where the actual data starts (after indentation)
-            data_start_pos = len(line) - len(line.lstrip())
-            
-            # For indented lines, we need to map the fields based on their positions in the header
-            # The indentation shifts everything, so we need to calculate the field widths
-            
-            # Calculate field widths from the header
-            local_intrfce_width = holdtme_pos - local_intrfce_pos
-            holdtme_width = capability_pos - holdtme_pos
-            capability_width = platform_pos - capability_pos
-            platform_width = port_id_pos - platform_pos
-            
-            # Extract each field using the calculated widths
-            local_interface = line[data_start_pos:data_start_pos + local_intrfce_width].strip()
-            holdtime = line[data_start_pos + local_intrfce_width:data_start_pos + local_intrfce_width + holdtme_width].strip()
-            capability = line[data_start_pos + local_intrfce_width + holdtme_width:data_start_pos + local_intrfce_width + holdtme_width + capability_width].strip()
-            platform = line[data_start_pos + local_intrfce_width + holdtme_width + capability_width:data_start_pos + local_intrfce_width + holdtme_width + capability_width + platform_width].strip()
-            port_id = line[data_start_pos + local_intrfce_width + holdtme_width + capability_width + platform_width:].strip()
-            
-            
-            neighbors.append({
-                'source_switch': source_switch,
-                'device_id': current_device_id,
-                'local_interface': local_interface,
-                'holdtime': holdtime,
-                'capability': capability,
-                'platform': platform,
-                'port_id': port_id
-            })
-        
-        # Handle case where device ID and data are on the same line
-        elif len(line.strip()) > 0 and not current_device_id:
-            # Extract fields based on column positions
-            device_id = line[device_id_pos:local_intrfce_pos].strip()
-            local_interface = line[local_intrfce_pos:holdtme_pos].strip()
-            holdtime = line[holdtme_pos:capability_pos].strip()
-            capability = line[capability_pos:platform_pos].strip()
-            platform = line[platform_pos:port_id_pos].strip()
-            port_id = line[port_id_pos:].strip()
-            
+        df = parse_cdp_output(raw_output, switch)
+    if df.empty:
+        df = pd.DataFrame([["No CDP neighbors found"]], columns=["Info"])
+    return df
+
+def collect_cdp_neighbors(switch, username, password, structured=False):
+    """Collect and parse CDP neighbors from one switch (see parse_cdp_sheet).
+
+    The neighbor table is parsed while it is still arriving. A failed fetch
+    returns its "ERROR: ..." output for the retry logic instead of a sheet.
+    """
+    stream = TableStream("neighbors", host=switch)
+    raw_output = fetch_cdp_output(switch, username, password, structured, stream)
+    if cdp_output_error(raw_output):
+        return raw_output
+    return parse_cdp_sheet(switch, raw_output, stream)
+
+def cdp_output_error(raw_output):
+    """Return the error message for a failed fetch_cdp_output result, or None."""
+    if raw_output is None:
+        return "SSH connection failed"
+    if raw_output.startswith("ERROR:"):
+        return raw_output
+    return None
+
+# Node appearance by device type, shared by the PyVis and the offline page
+NODE_STYLES = {
+    'switch': {'color': '#4da6ff', 'shape': 'dot', 'size': 25},  # Blue
+    'router': {'color': '#59b300', 'shape': 'diamond', 'size': 25},  # Green
+    'other': {'color': '#cccccc', 'shape': 'square', 'size': 20},  # Gray
+}
+
+# Assets loaded from CDNs by the default page
+CDN_HEAD_ASSETS = """<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/vis-network/9.1.2/dist/dist/vis-network.min.css" integrity="sha512-WgxfT5LWjfszlPHXRmBWHkV2eceiWTOBvrKCNbdgDYTHrT2AeLCGbF4sZlZw3UMN3WtL0tGUoIAKsu8mllg/XA==" crossorigin="anonymous" referrerpolicy="no-referrer" />
+            <script src="https://cdnjs.cloudflare.com/ajax/libs/vis-network/9.1.2/dist/vis-network.min.js" integrity="sha512-LnvoEWDFrqGHlHmDD2101OrLcbsfkrzoSpvtSQtxK3RMnRV0eOkhhBN2dXHKRrUU8p2DGRTk35n4O8nWSVe1mQ==" crossorigin="anonymous" referrerpolicy="no-referrer"></script>
             
-            neighbors.append({
-                'source_switch': source_switch,
-                'device_id': device_id,
-                'local_interface': local_interface,
-                'holdtime': holdtime,
-                'capability': capability,
-                'platform': platform,
-                'port_id': port_id
-            })
-        
-        i += 1
-    
-    return pd.DataFrame(neighbors)
+            <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.0.0-beta3/dist/css/bootstrap.min.css" rel="stylesheet" integrity="sha384-eOJMYsd53ii+scO/bJGFsiCZc+5NDVN2yr8+0RDqr0Ql0h+rP48ckxlpbzKgwra6" crossorigin="anonymous" />"""
+
+# The few Bootstrap rules the page layout relies on, used instead of the
+# Bootstrap stylesheet in the offline page
+OFFLINE_LAYOUT_CSS = (
+    "*,::after,::before{box-sizing:border-box}"
+    "body{font-family:system-ui,-apple-system,'Segoe UI',Roboto,'Helvetica Neue',Arial,sans-serif;font-size:1rem;line-height:1.5;color:#212529}"
+    ".row{display:flex;flex-wrap:wrap}"
+    ".col-md-3,.col-md-9{position:relative;width:100%}"
+    "@media (min-width:768px){.col-md-3{flex:0 0 25%;max-width:25%}.col-md-9{flex:0 0 75%;max-width:75%}}"
+    "@media (min-width:992px){.col-lg-2{flex:0 0 16.666667%;max-width:16.666667%}.col-lg-10{flex:0 0 83.333333%;max-width:83.333333%}}"
+    ".p-0{padding:0!important}"
+    "h4{font-size:1.5rem;font-weight:500;line-height:1.2;margin-top:0}"
+    ".form-control{display:block;font-size:1rem;line-height:1.5}"
+)
+
+def vis_network_asset_dir():
+    """Return the directory of the minified vis-network build bundled with PyVis.
+
+    Raises FileNotFoundError if the installed PyVis predates 0.3, which first
+    shipped vis-network 9.1.2.
+    """
+    import pyvis
+    asset_dir = os.path.join(os.path.dirname(pyvis.__file__), 'templates', 'lib', 'vis-9.1.2')
+    if not os.path.isdir(asset_dir):
+        raise FileNotFoundError(f"Offline plots need the vis-network 9.1.2 files bundled with pyvis>=0.3.0, "
+                                f"not found in {asset_dir}; upgrade with 'pip install -U pyvis'")
+    return asset_dir
+
+def offline_head_assets():
+    """Return <head> markup with vis-network and the layout CSS inlined."""
+    asset_dir = vis_network_asset_dir()
+    with open(os.path.join(asset_dir, 'vis-network.css'), encoding='utf-8') as f:
+        vis_css = f.read()
+    with open(os.path.join(asset_dir, 'vis-network.min.js'), encoding='utf-8') as f:
+        vis_js = f.read()
+    # A literal "</script>" inside the inlined code would end the script element
+    vis_js = vis_js.replace('</script', '<\\/script')
+    return f"<style>{vis_css}{OFFLINE_LAYOUT_CSS}</style>\n            <script>{vis_js}</script>"
+
+def offline_graph_data(G):
+    """Return JavaScript that builds the vis DataSets from a compact JSON payload.
+
+    Nodes are sent as [id, type index] and edges as [from index, to index,
+    local interface, remote port, ...] with one interface pair per member link;
+    labels, titles and styles are rebuilt in the browser, which keeps the payload
+    a fraction of PyVis's per-node dictionaries.
+    """
+    types = list(NODE_STYLES)
+    node_ids = list(G.nodes())
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+    payload = {
+        't': types,
+        's': NODE_STYLES,
+        'n': [[node_id, types.index(G.nodes[node_id].get('device_type', 'other'))] for node_id in node_ids],
+        'e': [],
+    }
+    for u, v, data in G.edges(data=True):
+        # Keep the edge oriented the way it was observed so the interfaces line up
+        if data.get('local_device', u) != u:
+            u, v = v, u
+        members = data.get('members') or [[data.get('local_interface', ''), data.get('port_id', '')]]
+        edge = [index[u], index[v]]
+        for local_interface, port_id in members:
+            edge += [local_interface, port_id]
+        payload['e'].append(edge)
+    payload_json = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).replace('</', '<\\/')
+    return f"""var graphData = {payload_json};
+                    nodes = new vis.DataSet(graphData.n.map(function (n) {{
+                        var type = graphData.t[n[1]];
+                        return Object.assign({{id: n[0], label: n[0], title: n[0], device_type: type}}, graphData.s[type]);
+                    }}));
+                    edges = new vis.DataSet(graphData.e.map(function (e) {{
+                        var from = graphData.n[e[0]][0], to = graphData.n[e[1]][0], local = [], remote = [];
+                        for (var i = 2; i < e.length; i += 2) {{
+                            local.push(e[i]);
+                            remote.push(e[i + 1]);
+                        }}
+                        var label = local.length === 1 ? local[0] + " → " + remote[0] : local.length + " links";
+                        return {{from: from, to: to, label: label, title: from + " (" + local.join(", ") + ") <-> " + to + " (" + remote.join(", ") + ")"}};
+                    }}));"""
+
+def build_search_index(node_ids):
+    """Build the sidebar search index for the topology page.
+
+    Returns the node ids sorted case-insensitively and, for every lowercase
+    trigram, the positions of the ids containing it, delta-encoded to keep the
+    embedded JSON small.
+    """
+    ids = sorted(node_ids, key=lambda node_id: (node_id.lower(), node_id))
+    postings = defaultdict(list)
+    for position, node_id in enumerate(ids):
+        lower = node_id.lower()
+        for trigram in {lower[i:i + 3] for i in range(len(lower) - 2)}:
+            postings[trigram].append(position)
+    trigrams = {}
+    for trigram, positions in postings.items():
+        trigrams[trigram] = [positions[0]] + [b - a for a, b in zip(positions, positions[1:])]
+    return {'ids': ids, 'tri': trigrams}
 
 def normalize_device_name(device_name):
     """Normalize device names by removing serial numbers in parentheses."""
@@ -193,53 +257,123 @@ def normalize_device_name(device_name):
     if '(' in device_name and ')' in device_name:
         # Extract the part before the parenthesis
         base_name = device_name.split('(')[0].strip()
-        # If the base name ends with a domain, keep it as is
-        if base_name.endswith('.umm.edu'):
+        # If the base name already has a domain, keep it as is
+        if base_name.endswith('.umm.edu') or '.' in base_name:
             return base_name
         # Otherwise, try to find a matching device with domain
         domain_name = f"{base_name}.umm.edu"
         return domain_name
     return device_name
 
-def plot_connections(all_neighbors, output_file):
-    """Plot the network connections using PyVis for a more interactive and visually appealing graph."""
-    # Create a networkx graph
-    G = nx.Graph()
-    
-    # Create a mapping of original device names to normalized names
+class LinkStore:
+    """Links between devices, deduplicated across both ends and bundled per device pair.
+
+    Each unordered device pair maps to one bundle through a canonical (sorted)
+    key. A bundle holds its member links as [interface on a, interface on b], so
+    a link reported by both switches is stored once and parallel links (such as
+    port-channel members) are kept side by side instead of overwriting each other.
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.bundles = []
+
+    def add(self, local_device, local_interface, remote_device, remote_interface, row=None):
+        """Record one observed link; return False if it was already seen from either end."""
+        if remote_device < local_device:
+            local_device, remote_device = remote_device, local_device
+            local_interface, remote_interface = remote_interface, local_interface
+        position = self.index.get((local_device, remote_device))
+        if position is None:
+            position = self.index[(local_device, remote_device)] = len(self.bundles)
+            self.bundles.append({'a': local_device, 'b': remote_device, 'members': [], 'keys': set(), 'rows': []})
+        bundle = self.bundles[position]
+        key = (interface_key(local_interface), interface_key(remote_interface))
+        if key in bundle['keys']:
+            return False
+        bundle['keys'].add(key)
+        bundle['members'].append([local_interface, remote_interface])
+        if row is not None:
+            bundle['rows'].append(row)
+        return True
+
+    def __len__(self):
+        return len(self.bundles)
+
+    def __iter__(self):
+        return iter(self.bundles)
+
+    def link_count(self):
+        """Return the number of distinct physical links."""
+        return sum(len(bundle['members']) for bundle in self.bundles)
+
+    def rows(self):
+        """Return the positions of the first observation of every distinct link, in input order."""
+        return sorted(row for bundle in self.bundles for row in bundle['rows'])
+
+def device_name_mapping(all_neighbors):
+    """Map every device name in the CDP neighbors to its normalized name."""
     device_name_map = {}
     
-    # First pass: build the device name mapping
-    for _, row in all_neighbors.iterrows():
-        source = row['source_switch']
-        target = row['device_id']
-        
-        # Normalize source and target names
-        norm_source = normalize_device_name(source)
-        norm_target = normalize_device_name(target)
-        
-        # Add to mapping
-        device_name_map[source] = norm_source
-        device_name_map[target] = norm_target
+    # First pass: normalize source and target names
+    for name in pd.concat([all_neighbors['source_switch'], all_neighbors['device_id']]).unique():
+        device_name_map[name] = normalize_device_name(name)
     
     # Second pass: find domain versions of devices
     # This helps consolidate devices that appear both with and without domain
+    normalized = set(device_name_map.values())
     for orig_name, norm_name in list(device_name_map.items()):
         if not norm_name.endswith('.umm.edu'):
             domain_name = f"{norm_name}.umm.edu"
-            if domain_name in device_name_map.values():
+            if domain_name in normalized:
                 device_name_map[orig_name] = domain_name
     
-    # Add nodes and edges with normalized names
-    for _, row in all_neighbors.iterrows():
-        source = row['source_switch']
-        target = row['device_id']
-        
-        # Use normalized names
+    return device_name_map
+
+def build_link_store(all_neighbors, device_name_map=None):
+    """Deduplicate and bundle the links in the combined CDP neighbors."""
+    if device_name_map is None:
+        device_name_map = device_name_mapping(all_neighbors)
+    store = LinkStore()
+    columns = zip(all_neighbors['source_switch'], all_neighbors['local_interface'],
+                  all_neighbors['device_id'], all_neighbors['port_id'])
+    for row, (source, local_interface, target, port_id) in enumerate(columns):
+        store.add(device_name_map.get(source, source), local_interface,
+                  device_name_map.get(target, target), port_id, row)
+    return store
+
+def unique_connections(all_neighbors):
+    """Return the CDP neighbor rows with links seen from both ends listed once."""
+    if all_neighbors.empty:
+        return all_neighbors
+    return all_neighbors.iloc[build_link_store(all_neighbors).rows()].reset_index(drop=True)
+
+def link_label(members):
+    """Edge label for a bundle: the interfaces of a single link, or the member count."""
+    if len(members) == 1:
+        return f"{members[0][0]} → {members[0][1]}"
+    return f"{len(members)} links"
+
+def build_topology_graph(all_neighbors):
+    """Build a networkx graph of the devices and links in the combined CDP neighbors.
+
+    Links between the same two devices are merged into one edge whose members
+    attribute lists every physical link as [interface on local_device, remote port].
+    """
+    import networkx as nx
+
+    # Create a networkx graph
+    G = nx.Graph()
+    
+    # Create a mapping of original device names to normalized names
+    device_name_map = device_name_mapping(all_neighbors)
+    
+    # Add nodes with device type attribute
+    for source, target, capability in zip(all_neighbors['source_switch'], all_neighbors['device_id'],
+                                          all_neighbors['capability']):
         norm_source = device_name_map.get(source, source)
         norm_target = device_name_map.get(target, target)
         
-        # Add nodes with device type attribute
         if not G.has_node(norm_source):
             G.add_node(norm_source, device_type='switch')
         
@@ -247,61 +381,45 @@ def plot_connections(all_neighbors, output_file):
             # Determine device type based on capability
             device_type = 'other'
             # Split capability into individual codes and check for 'R' and 'S'
-            capability_codes = row['capability'].split()
+            capability_codes = capability.split()
             if 'R' in capability_codes:
                 device_type = 'router'
             elif 'S' in capability_codes:
                 device_type = 'switch'
             G.add_node(norm_target, device_type=device_type)
-        
-        # Add edge with interface information
+    
+    # Add one edge per device pair with interface information for every member link
+    for bundle in build_link_store(all_neighbors, device_name_map):
+        a, b, members = bundle['a'], bundle['b'], bundle['members']
+        local_interface = ', '.join(member[0] for member in members)
+        port_id = ', '.join(member[1] for member in members)
         G.add_edge(
-            norm_source, 
-            norm_target, 
-            title=f"{norm_source} ({row['local_interface']}) <-> {norm_target} ({row['port_id']})",
-            label=f"{row['local_interface']} → {row['port_id']}",
-            local_interface=row['local_interface'],
-            port_id=row['port_id']
+            a,
+            b,
+            title=f"{a} ({local_interface}) <-> {b} ({port_id})",
+            label=link_label(members),
+            local_interface=local_interface,
+            port_id=port_id,
+            local_device=a,
+            links=len(members),
+            members=members
         )
     
-    # Create a PyVis network from the networkx graph
-    net = Network(height="900px", width="100%", bgcolor="#ffffff", font_color="black")
-    
-    # Set physics layout options for better visualization with longer edges for readability
-    net.barnes_hut(gravity=-80000, central_gravity=0.3, spring_length=350, spring_strength=0.001, damping=0.09)
-    
-    # Add the networkx graph to the PyVis network
-    net.from_nx(G)
-    
-    # Define node colors and shapes based on device type
-    for node in net.nodes:
-        # Get the device type from the original networkx graph
-        node_id = node['id']
-        if node_id in G.nodes and 'device_type' in G.nodes[node_id]:
-            device_type = G.nodes[node_id]['device_type']
-            if device_type == 'switch':
-                node['color'] = '#4da6ff'  # Blue
-                node['shape'] = 'dot'
-                node['size'] = 25
-            elif device_type == 'router':
-                node['color'] = '#59b300'  # Green
-                node['shape'] = 'diamond'
-                node['size'] = 25
-            else:
-                node['color'] = '#cccccc'  # Gray
-                node['shape'] = 'square'
-                node['size'] = 20
-        
-        # Add hover information
-        node['title'] = node['id']
-    
-    # Add hover information to edges
-    for edge in net.edges:
-        if 'title' not in edge:
-            edge['title'] = f"{edge['from']} <-> {edge['to']}"
+    return G
+
+def plot_connections(all_neighbors, output_file, offline=False, G=None):
+    """Plot the network connections using PyVis for a more interactive and visually appealing graph.
+
+    With offline=True the page is self-contained: vis-network is inlined from the
+    copy bundled with PyVis, the graph data is embedded as compact JSON and no
+    CDN or other network request is made when the page is opened. A graph already
+    built with build_topology_graph can be passed as G to avoid rebuilding it.
+    """
+    if G is None:
+        G = build_topology_graph(all_neighbors)
     
-    # Set options for a more appealing visualization
-    net.set_options("""
+    # Options for a more appealing visualization
+    options_json = """
     {
       "nodes": {
         "font": {
@@ -342,26 +460,54 @@ def plot_connections(all_neighbors, output_file):
         "keyboard": true
       }
     }
-    """)
+    """
+    
+    if not offline:
+        from pyvis.network import Network
+
+        # Create a PyVis network from the networkx graph
+        net = Network(height="900px", width="100%", bgcolor="#ffffff", font_color="black")
+    
+        # Set physics layout options for better visualization with longer edges for readability
+        net.barnes_hut(gravity=-80000, central_gravity=0.3, spring_length=350, spring_strength=0.001, damping=0.09)
+    
+        # Add the networkx graph to the PyVis network
+        net.from_nx(G)
+        for edge in net.edges:
+            # The member list is already summarized in the label and title
+            edge.pop('members', None)
+    
+        # Define node colors and shapes based on device type
+        for node in net.nodes:
+            # Get the device type from the original networkx graph
+            node_id = node['id']
+            if node_id in G.nodes and 'device_type' in G.nodes[node_id]:
+                device_type = G.nodes[node_id]['device_type']
+                node.update(NODE_STYLES.get(device_type, NODE_STYLES['other']))
+        
+            # Add hover information
+            node['title'] = node['id']
+    
+        # Add hover information to edges
+        for edge in net.edges:
+            if 'title' not in edge:
+                edge['title'] = f"{edge['from']} <-> {edge['to']}"
+    
+        net.set_options(options_json)
     
     # Change the file extension to .html
     html_file = os.path.splitext(output_file)[0] + '.html'
     
-    # Get all node IDs for the device list
+    # Get all node IDs for the device list and index them for the search box
     all_node_ids = list(G.nodes())
-    all_node_ids.sort()  # Sort alphabetically
+    search_index = build_search_index(all_node_ids)
     
     # Create a custom HTML template with a left pane for device list and search
     html_template = """
     <html>
         <head>
             <meta charset="utf-8">
-            <script src="lib/bindings/utils.js"></script>
-            <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/vis-network/9.1.2/dist/dist/vis-network.min.css" integrity="sha512-WgxfT5LWjfszlPHXRmBWHkV2eceiWTOBvrKCNbdgDYTHrT2AeLCGbF4sZlZw3UMN3WtL0tGUoIAKsu8mllg/XA==" crossorigin="anonymous" referrerpolicy="no-referrer" />
-            <script src="https://cdnjs.cloudflare.com/ajax/libs/vis-network/9.1.2/dist/vis-network.min.js" integrity="sha512-LnvoEWDFrqGHlHmDD2101OrLcbsfkrzoSpvtSQtxK3RMnRV0eOkhhBN2dXHKRrUU8p2DGRTk35n4O8nWSVe1mQ==" crossorigin="anonymous" referrerpolicy="no-referrer"></script>
-            
-            <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.0.0-beta3/dist/css/bootstrap.min.css" rel="stylesheet" integrity="sha384-eOJMYsd53ii+scO/bJGFsiCZc+5NDVN2yr8+0RDqr0Ql0h+rP48ckxlpbzKgwra6" crossorigin="anonymous" />
-            <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.0.0-beta3/dist/js/bootstrap.bundle.min.js" integrity="sha384-JEW9xMcG8R+pH31jmWH6WWP0WintQrMb4s7ZOdauHnUtxwoG2vI5DkLtS3qm9Ekf" crossorigin="anonymous"></script>
+            {head_assets}
             
             <style type="text/css">
                 body {
@@ -398,17 +544,28 @@ def plot_connections(all_neighbors, output_file):
                 
                 .device-list {
                     margin-top: 15px;
-                    max-height: calc(100vh - 150px);
+                    height: calc(100vh - 150px);
                     overflow-y: auto;
+                    position: relative;
                 }
                 
+                /* Rows have a fixed height so only the visible ones need to exist */
                 .device-item {
-                    padding: 8px 12px;
+                    position: absolute;
+                    left: 0;
+                    right: 0;
+                    height: 36px;
+                    padding: 7px 12px;
                     border-bottom: 1px solid #dee2e6;
                     cursor: pointer;
+                    white-space: nowrap;
+                    overflow: hidden;
+                    text-overflow: ellipsis;
+                    box-sizing: border-box;
                 }
                 
-                .device-item:hover {
+                .device-item:hover,
+                .device-item.selected {
                     background-color: #e9ecef;
                 }
                 
@@ -507,29 +664,133 @@ def plot_connections(all_neighbors, output_file):
                     return network;
                 }
                 
+                // Search index built by plot_connections: ids sorted case-insensitively
+                // and, per lowercase trigram, the delta-encoded positions of the ids
+                // containing it
+                var searchIndex = {search_index};
+                var ROW_HEIGHT = 36;
+                var lowerIds = [];
+                var idPositions = {};
+                var trigramCache = {};
+                var deviceRows = [];
+                var selectedNodeId = null;
+                var renderPending = false;
+                
                 // Function to populate the device list in the sidebar
                 function populateDeviceList() {
                     const deviceList = document.getElementById('device-list');
                     
-                    // Clear existing content
-                    deviceList.innerHTML = '';
+                    lowerIds = searchIndex.ids.map(id => id.toLowerCase());
+                    searchIndex.ids.forEach((id, i) => { idPositions[id] = i; });
+                    deviceRows = searchIndex.ids.map((id, i) => i);
+                    
+                    // The spacer gives the list its full scroll height; rows are drawn into it on demand
+                    deviceList.innerHTML = '<div id="device-list-spacer" style="position: relative;"></div>';
+                    deviceList.addEventListener('scroll', scheduleRender);
+                    window.addEventListener('resize', scheduleRender);
+                    
+                    // One click handler for all rows, present and future
+                    deviceList.addEventListener('click', e => {
+                        const item = e.target.closest('.device-item');
+                        if (item) {
+                            focusNode(item.getAttribute('data-node-id'));
+                        }
+                    });
+                    
+                    renderDeviceList();
+                }
+                
+                function scheduleRender() {
+                    if (!renderPending) {
+                        renderPending = true;
+                        requestAnimationFrame(() => {
+                            renderPending = false;
+                            renderDeviceList();
+                        });
+                    }
+                }
+                
+                // Draw only the rows inside the visible part of the list
+                function renderDeviceList() {
+                    const deviceList = document.getElementById('device-list');
+                    const spacer = document.getElementById('device-list-spacer');
+                    spacer.style.height = (deviceRows.length * ROW_HEIGHT) + 'px';
                     
-                    // Get all nodes
-                    const nodeIds = Object.keys(allNodes);
-                    nodeIds.sort(); // Sort alphabetically
+                    const first = Math.max(0, Math.floor(deviceList.scrollTop / ROW_HEIGHT) - 10);
+                    const last = Math.min(deviceRows.length, Math.ceil((deviceList.scrollTop + deviceList.clientHeight) / ROW_HEIGHT) + 10);
+                    const fragment = document.createDocumentFragment();
                     
-                    // Add each node to the list
-                    nodeIds.forEach(nodeId => {
-                        const node = allNodes[nodeId];
-                        
-                        // Create list item
+                    for (let row = first; row < last; row++) {
+                        const nodeId = searchIndex.ids[deviceRows[row]];
+                        const node = allNodes[nodeId] || {};
                         const deviceItem = document.createElement('div');
-                        deviceItem.className = `device-item ${node.device_type || 'other'}`;
+                        deviceItem.className = `device-item ${node.device_type || 'other'}` + (nodeId === selectedNodeId ? ' selected' : '');
+                        deviceItem.style.top = (row * ROW_HEIGHT) + 'px';
                         deviceItem.textContent = nodeId;
                         deviceItem.setAttribute('data-node-id', nodeId);
-                        deviceItem.addEventListener('click', () => focusNode(nodeId));
-                        deviceList.appendChild(deviceItem);
+                        fragment.appendChild(deviceItem);
+                    }
+                    
+                    spacer.replaceChildren(fragment);
+                }
+                
+                // Positions of the ids containing a trigram, decoded once and cached
+                function trigramPositions(trigram) {
+                    if (!(trigram in trigramCache)) {
+                        const deltas = searchIndex.tri[trigram];
+                        let positions = null;
+                        if (deltas) {
+                            positions = new Array(deltas.length);
+                            let position = 0;
+                            for (let i = 0; i < deltas.length; i++) {
+                                position += deltas[i];
+                                positions[i] = position;
+                            }
+                        }
+                        trigramCache[trigram] = positions;
+                    }
+                    return trigramCache[trigram];
+                }
+                
+                // Return the positions of the ids containing filterText, prefix matches first
+                function searchDevices(filterText) {
+                    filterText = filterText.toLowerCase();
+                    if (!filterText) {
+                        return searchIndex.ids.map((id, i) => i);
+                    }
+                    
+                    let candidates;
+                    if (filterText.length >= 3) {
+                        // Intersect the posting lists of the query's trigrams, shortest first
+                        const lists = [];
+                        for (let i = 0; i + 3 <= filterText.length; i++) {
+                            const positions = trigramPositions(filterText.substr(i, 3));
+                            if (!positions) {
+                                return [];
+                            }
+                            lists.push(positions);
+                        }
+                        lists.sort((a, b) => a.length - b.length);
+                        candidates = lists[0];
+                        for (let i = 1; i < lists.length && candidates.length; i++) {
+                            const other = new Set(lists[i]);
+                            candidates = candidates.filter(position => other.has(position));
+                        }
+                    } else {
+                        candidates = lowerIds.map((id, i) => i);
+                    }
+                    
+                    const prefixMatches = [];
+                    const otherMatches = [];
+                    candidates.forEach(position => {
+                        const id = lowerIds[position];
+                        if (id.startsWith(filterText)) {
+                            prefixMatches.push(position);
+                        } else if (id.includes(filterText)) {
+                            otherMatches.push(position);
+                        }
                     });
+                    return prefixMatches.concat(otherMatches);
                 }
                 
                 // Function to initialize the search functionality
@@ -544,13 +805,9 @@ def plot_connections(all_neighbors, output_file):
                     // Handle Enter key press
                     deviceSearch.addEventListener('keydown', function(e) {
                         if (e.key === 'Enter') {
-                            // Find the first visible device and focus on it
-                            const visibleDevices = document.querySelectorAll('.device-list .device-item[style="display: block;"], .device-list .device-item:not([style*="display: none"])');
-                            if (visibleDevices.length > 0) {
-                                const nodeId = visibleDevices[0].getAttribute('data-node-id');
-                                if (nodeId) {
-                                    focusNode(nodeId);
-                                }
+                            // Focus on the first matching device
+                            if (deviceRows.length > 0) {
+                                focusNode(searchIndex.ids[deviceRows[0]]);
                             }
                             // Prevent form submission
                             e.preventDefault();
@@ -560,21 +817,10 @@ def plot_connections(all_neighbors, output_file):
                 
                 // Function to filter the device list
                 function filterDeviceList(filterText) {
-                    filterText = filterText.toLowerCase();
-                    const deviceItems = document.querySelectorAll('.device-list .device-item');
-                    let visibleCount = 0;
-                    
-                    deviceItems.forEach(item => {
-                        const deviceName = item.textContent.toLowerCase();
-                        if (deviceName.includes(filterText)) {
-                            item.style.display = 'block';
-                            visibleCount++;
-                        } else {
-                            item.style.display = 'none';
-                        }
-                    });
-                    
-                    return visibleCount;
+                    deviceRows = searchDevices(filterText);
+                    document.getElementById('device-list').scrollTop = 0;
+                    renderDeviceList();
+                    return deviceRows.length;
                 }
                 
                 // Function to focus on a specific node
@@ -591,16 +837,17 @@ def plot_connections(all_neighbors, output_file):
                     // Select the node
                     network.selectNodes([nodeId]);
                     
-                    // Highlight the node in the list
-                    const listItems = document.querySelectorAll('.device-item');
-                    listItems.forEach(item => {
-                        if (item.getAttribute('data-node-id') === nodeId) {
-                            item.style.backgroundColor = '#e9ecef';
-                            item.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
-                        } else {
-                            item.style.backgroundColor = '';
+                    // Highlight the node in the list, scrolling it into view if needed
+                    selectedNodeId = nodeId;
+                    const row = deviceRows.indexOf(idPositions[nodeId]);
+                    const deviceList = document.getElementById('device-list');
+                    if (row !== -1) {
+                        const top = row * ROW_HEIGHT;
+                        if (top < deviceList.scrollTop || top + ROW_HEIGHT > deviceList.scrollTop + deviceList.clientHeight) {
+                            deviceList.scrollTop = Math.max(0, top - deviceList.clientHeight / 2);
                         }
-                    });
+                    }
+                    renderDeviceList();
                 }
                 
                 // Draw the graph
@@ -610,51 +857,67 @@ def plot_connections(all_neighbors, output_file):
     </html>
     """
     
-    # Replace placeholders in the template
-    # Use the original PyVis generated HTML to extract the nodes and edges data
-    temp_file = "temp_network.html"
-    net.save_graph(temp_file)
+    if offline:
+        # Embed the graph data directly; no PyVis round trip through a temporary file
+        html_content = html_template.replace("{nodes_and_edges}", offline_graph_data(G))
+        options = json.loads(options_json)
+        options['nodes']['font']['color'] = 'black'  # PyVis sets this per node
+        html_content = html_content.replace("{options}", json.dumps(options, separators=(',', ':')))
+        head_assets = offline_head_assets()
+    else:
+        # Replace placeholders in the template
+        # Use the original PyVis generated HTML to extract the nodes and edges data
+        temp_file = "temp_network.html"
+        net.save_graph(temp_file)
     
-    with open(temp_file, 'r') as f:
-        temp_html = f.read()
+        with open(temp_file, 'r') as f:
+            temp_html = f.read()
     
-    # Extract the nodes and edges data from the temporary HTML
-    nodes_pattern = r"nodes = new vis.DataSet\(\[(.*?)\]\);"
-    edges_pattern = r"edges = new vis.DataSet\(\[(.*?)\]\);"
+        # Extract the nodes and edges data from the temporary HTML
+        nodes_pattern = r"nodes = new vis.DataSet\(\[(.*?)\]\);"
+        edges_pattern = r"edges = new vis.DataSet\(\[(.*?)\]\);"
     
-    nodes_match = re.search(nodes_pattern, temp_html, re.DOTALL)
-    edges_match = re.search(edges_pattern, temp_html, re.DOTALL)
+        nodes_match = re.search(nodes_pattern, temp_html, re.DOTALL)
+        edges_match = re.search(edges_pattern, temp_html, re.DOTALL)
     
-    if nodes_match and edges_match:
-        nodes_data = nodes_match.group(1)
-        edges_data = edges_match.group(1)
+        if nodes_match and edges_match:
+            nodes_data = nodes_match.group(1)
+            edges_data = edges_match.group(1)
         
-        # Insert the extracted data into our custom template
-        nodes_and_edges_str = f"nodes = new vis.DataSet([{nodes_data}]);\n                    edges = new vis.DataSet([{edges_data}]);"
-        html_content = html_template.replace("{nodes_and_edges}", nodes_and_edges_str)
+            # Insert the extracted data into our custom template
+            nodes_and_edges_str = f"nodes = new vis.DataSet([{nodes_data}]);\n                    edges = new vis.DataSet([{edges_data}]);"
+            html_content = html_template.replace("{nodes_and_edges}", nodes_and_edges_str)
         
-        # Extract the options from the temporary HTML
-        options_pattern = r"var options = (.*?);"
-        options_match = re.search(options_pattern, temp_html, re.DOTALL)
+            # Extract the options from the temporary HTML
+            options_pattern = r"var options = (.*?);"
+            options_match = re.search(options_pattern, temp_html, re.DOTALL)
         
-        if options_match:
-            options_data = options_match.group(1)
-            html_content = html_content.replace("{options}", options_data)
+            if options_match:
+                options_data = options_match.group(1)
+                html_content = html_content.replace("{options}", options_data)
+            else:
+                # Fallback to the original options string if extraction fails
+                html_content = html_content.replace("{options}", net.options)
         else:
-            # Fallback to the original options string if extraction fails
-            html_content = html_content.replace("{options}", net.options)
-    else:
-        # Fallback to the original method if extraction fails
-        nodes_and_edges_str = f"nodes = new vis.DataSet({net.nodes});\n                    edges = new vis.DataSet({net.edges});"
-        html_content = html_template.replace("{nodes_and_edges}", nodes_and_edges_str)
-        html_content = html_content.replace("{options}", str(net.options).replace("'", '"'))
+            # Fallback to the original method if extraction fails
+            nodes_and_edges_str = f"nodes = new vis.DataSet({net.nodes});\n                    edges = new vis.DataSet({net.edges});"
+            html_content = html_template.replace("{nodes_and_edges}", nodes_and_edges_str)
+            html_content = html_content.replace("{options}", str(net.options).replace("'", '"'))
     
-    # Clean up the temporary file
-    if os.path.exists(temp_file):
-        os.remove(temp_file)
+        # Clean up the temporary file
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+    
+        head_assets = CDN_HEAD_ASSETS
+    
+    search_index_json = json.dumps(search_index, separators=(',', ':'), ensure_ascii=False).replace('</', '<\\/')
+    html_content = html_content.replace("{search_index}", search_index_json)
+    
+    # Inserted last so the inlined library code is never searched for placeholders
+    html_content = html_content.replace("{head_assets}", head_assets)
     
     # Write the HTML file
-    with open(html_file, 'w') as f:
+    with open(html_file, 'w', encoding='utf-8') as f:
         f.write(html_content)
     
     print(f"Interactive network visualization with device list saved to {html_file}")
@@ -669,8 +932,8 @@ def main():
         print(f"Created output directory: {output_dir}")
     
     # Initialize collections to store all switches and their credentials
-    all_switches = []
-    switch_credentials = {}
+    groups = []
+    group_credentials = {}
     csv_files = []
     
     # Get first CSV file and credentials
@@ -687,15 +950,35 @@ def main():
         print(f"Found {len(switches)} switches in {csv_file}.")
         
         # Store switches and their credentials
-        for switch in switches:
-            all_switches.append(switch)
-            switch_credentials[switch] = (username, password)
+        groups.append((csv_file, switches))
+        group_credentials[csv_file] = (username, password)
         
         # Ask if user has another CSV file with different credentials
         another = input("Do you have another CSV file with switches that use different credentials? (y/n): ").lower()
         if another != 'y':
             break
     
+    # A switch listed in several CSV files keeps the credentials of the first
+    all_switches, switch_group = dedupe_groups(groups)
+    switch_credentials = {switch: group_credentials[group] for switch, group in switch_group.items()}
+    
+    # NX-OS and EOS can return structured output, which needs no column slicing
+    structured = input("Request structured (| json) output where the switch supports it? (y/n): ").lower() == 'y'
+    
+    # Optional caps so one AAA server or site link is not flooded with logins
+    per_group, per_site = prompt_limits()
+    
+    # Offline pages inline all scripts so they open on air-gapped workstations
+    offline = input("Generate a self-contained HTML plot for offline use? (y/n): ").lower() == 'y'
+    
+    # Optional analysis of the topology graph (single points of failure, paths, rankings)
+    analytics = input("Run topology analytics (single points of failure, centrality, paths)? (y/n): ").lower() == 'y'
+    pairs = []
+    if analytics:
+        # networkx is only loaded when the analysis is wanted
+        from topology_analytics import analyze_topology, parse_device_pairs, write_analytics_sheets
+        pairs = parse_device_pairs(input("Enter device pairs for shortest paths (e.g. sw1,sw2; sw3,sw4) or press Enter to skip: "))
+    
     # Prepare output file names with date to avoid overwriting existing files
     # Use the first CSV file for naming the output files
     base, ext = os.path.splitext(csv_files[0])
@@ -719,45 +1002,62 @@ def main():
     print(f"Output will be saved to {excel_file} and {plot_file}")
     
     # Create Excel writer
+    # Each switch's neighbors are kept in a list and combined once at the end,
+    # instead of copying the growing table for every switch
     with pd.ExcelWriter(excel_file, engine='xlsxwriter') as writer:
-        all_neighbors = pd.DataFrame()
+        neighbor_frames = []
+        
+        # Skip switches that failed repeatedly in previous runs
+        health = HostHealth()
+        to_poll, skipped = health.partition(all_switches)
+        for switch in skipped:
+            print(f"Skipping {switch}: {health.describe(switch)}")
+        
+        # Slowest switches first, CSV files interleaved, within the session caps
+        to_poll = schedule_hosts(to_poll, switch_group, health)
+        limits = ConcurrencyLimits(switch_group, per_group, per_site)
         
-        # Process each switch with its corresponding credentials
-        for switch in all_switches:
+        def fetch(switch):
             username, password = switch_credentials[switch]
             print(f"Connecting to {switch}...")
-            client = ssh_to_switch(switch, username, password)
-            
-            if client:
-                raw_output = get_cdp_neighbors(client, switch)
-                client.close()
-                
-                if raw_output.startswith("ERROR:"):
-                    df = pd.DataFrame([[raw_output]], columns=["Error"])
-                else:
-                    df = parse_cdp_output(raw_output, switch)
-                    if df.empty:
-                        df = pd.DataFrame([["No CDP neighbors found"]], columns=["Info"])
-                    else:
-                        # Add to the combined dataframe
-                        all_neighbors = pd.concat([all_neighbors, df], ignore_index=True)
+            return collect_cdp_neighbors(switch, username, password, structured)
+        
+        def write(switch, df):
+            if df is not None:
+                if 'device_id' in df.columns:
+                    neighbor_frames.append(df)
                 
                 # Save to Excel
-                sheet_name = str(switch)[:31]  # Excel sheet names limited to 31 chars
-                df.to_excel(writer, sheet_name=sheet_name, index=False)
+                df.to_excel(writer, sheet_name=excel_sheet_name(switch), index=False)
                 print(f"Processed {switch}: Found {len(df)} CDP neighbors")
             else:
                 print(f"Skipping {switch} due to connection error")
         
+        # SSH sessions and sheet writing run as overlapping stages, each table
+        # parsed while it arrives; failed switches are retried with backoff
+        # after the healthy ones
+        run_pipeline(to_poll, fetch, functools.partial(keep_sheet, parse_cdp_sheet), write,
+                     functools.partial(sheet_error, cdp_output_error), health, use_processes=False, limits=limits)
+        
         # Create a summary sheet with all connections
-        if not all_neighbors.empty:
-            all_neighbors.to_excel(writer, sheet_name="All_Connections", index=False)
-            print(f"Found {len(all_neighbors)} total connections across all switches")
+        if neighbor_frames:
+            all_neighbors = pd.concat(neighbor_frames, ignore_index=True)
+            # Links reported by both switches are listed once
+            connections = unique_connections(all_neighbors)
+            connections.to_excel(writer, sheet_name="All_Connections", index=False)
+            print(f"Found {len(connections)} total connections across all switches")
             
             # Plot the connections
             print("Generating network plot...")
-            G = plot_connections(all_neighbors, plot_file)
+            G = build_topology_graph(all_neighbors)
+            plot_connections(all_neighbors, plot_file, offline=offline, G=G)
             print(f"Network plot saved to {plot_file}")
+            
+            if analytics:
+                print("Analyzing topology...")
+                results = analyze_topology(G, pairs)
+                write_analytics_sheets(results, writer)
+                print(f"Found {len(results['Articulation_Points'])} articulation points and {len(results['Bridges'])} bridges")
         else:
             print("No CDP neighbors found across all switches")
     
@@ -0,0 +1,424 @@
+import codecs
+import json
+import re
+from functools import lru_cache
+
+# Output schemas, the same for every platform
+INTERFACE_STATUS_COLUMNS = ["Port", "Name", "Status", "Vlan", "Duplex", "Speed", "Type"]
+NEIGHBOR_COLUMNS = ["device_id", "local_interface", "holdtime", "capability", "platform", "port_id"]
+
+PLATFORMS = ("ios", "nxos", "eos")
+DEFAULT_PLATFORM = "ios"
+
+# Checked against the first lines of output, in order; anything else is IOS/IOS-XE
+PLATFORM_SIGNATURES = [
+    ("eos", re.compile(r"Arista|^Port\s+Name\s+Status\s+Vlan\s+Duplex\s+Speed\s+Type\s+Flags"
+                       r"|^Port\s+Neighbor Device ID|^(?:Et|Ma)\d+(?:/\d+)*\s"
+                       r'|"interfaceStatuses"|"lldpNeighbors"', re.M)),
+    ("nxos", re.compile(r"Cisco Nexus|NX-OS|^Device-ID\s+Local Intrfce\s+Hldtme|^(?:Eth\d+/\d+|mgmt0)\s"
+                        r'|"TABLE_\w+"', re.M)),
+]
+DETECT_LINES = 40
+
+PROMPT = re.compile(r"^\S+#")
+SEPARATOR = re.compile(r"^-[-\s]*$")
+TOTAL = re.compile(r"^Total .*entries", re.I)
+
+JSON_START = re.compile(r"^\s*\{", re.M)
+
+TEMPLATES = {}
+JSON_MAPPERS = {}
+# Platform found for each host, so later outputs parsed in the same process
+# skip detection. Parser pool processes keep their own copy, which is lost
+# when the pool shuts down, so only in-process parsing (TableStream in the
+# fetch threads, direct calls) benefits across outputs of a switch.
+_host_platforms = {}
+
+
+def table_template(fields, wrapped=False, empty=()):
+    """Compile a fixed-width CLI table layout.
+
+    fields is a list of (output column, header spellings, optional) in header
+    order; an output column of None is read but dropped. The header regex gets
+    one group per field, so the column offsets come straight from the match.
+    With wrapped=True a first-column value alone on its line (a long CDP device
+    ID) applies to the indented line below it. Values listed in empty (such as
+    NX-OS's "--") are read as blank. Header words after the last field (a
+    column added by a newer release) are matched as "extra" and ignored.
+    """
+    parts = []
+    for i, (_, spellings, optional) in enumerate(fields):
+        group = "(" + "|".join(re.escape(spelling) for spelling in spellings) + ")"
+        if i == 0:
+            parts.append(r"^\s*" + group)
+        elif optional:
+            parts.append(r"(?:\s+" + group + ")?")
+        else:
+            parts.append(r"\s+" + group)
+    return {
+        "header": re.compile("".join(parts) + r"(?:\s+(?P<extra>\S.*?))?\s*$"),
+        "columns": [column for column, _, _ in fields],
+        "wrapped": wrapped,
+        "empty": set(empty),
+    }
+
+
+def register(command, platform, template):
+    """Add a template for a command on a platform."""
+    TEMPLATES.setdefault((command, platform), []).append(template)
+    templates_for.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def templates_for(command, platform):
+    """Return the templates to try for a command on a platform."""
+    return tuple(TEMPLATES.get((command, platform)) or TEMPLATES.get((command, DEFAULT_PLATFORM), ()))
+
+
+def detect_platform(output):
+    """Guess the platform from the first lines of output."""
+    head = "\n".join(output.splitlines()[:DETECT_LINES])
+    for platform, signature in PLATFORM_SIGNATURES:
+        if signature.search(head):
+            return platform
+    return DEFAULT_PLATFORM
+
+
+def _bounds(starts, offset=0):
+    ends = [start + offset for start in starts[1:]] + [None]
+    return [(start + offset, end) for start, end in zip(starts, ends)]
+
+
+def _match_header(line, templates):
+    for template in templates:
+        match = template["header"].match(line)
+        if match:
+            return template, match
+    return None
+
+
+class RowReader:
+    """Turn the lines below a matched table header into rows, one line at a time."""
+
+    def __init__(self, template, match):
+        groups = [i + 1 for i in range(len(template["columns"])) if match.start(i + 1) != -1]
+        self.starts = [match.start(group) for group in groups]
+        self.keep = [i for i, group in enumerate(groups) if template["columns"][group - 1]]
+        self.columns = [template["columns"][groups[i] - 1] for i in self.keep]
+        if match.start("extra") != -1:
+            # Unknown trailing columns end the last known one and are dropped
+            self.starts.append(match.start("extra"))
+        self.bounds = _bounds(self.starts)
+        # Rows may stop before trailing columns that are dropped anyway
+        self.min_length = self.starts[self.keep[-1]]
+        self.wrapped = template["wrapped"]
+        self.empty = template["empty"]
+        self.pending = None
+        self.finished = False
+
+    def read(self, line):
+        """Return the row completed by line, or None. Sets finished at the next prompt."""
+        stripped = line.strip()
+        if not stripped or SEPARATOR.match(stripped) or TOTAL.match(stripped):
+            return None
+        if PROMPT.match(line):
+            self.finished = True
+            return None
+        starts = self.starts
+        if self.wrapped and not line[0].isspace():
+            # A value continuing past the first column means the row is on one line
+            second = starts[1]
+            if len(line) > second and line[second - 1] == " " and line[second:].strip():
+                values = [line[start:end].strip() for start, end in self.bounds]
+            else:
+                self.pending = stripped
+                return None
+        elif self.wrapped:
+            if self.pending is None:
+                return None
+            # Continuation lines may be indented differently from the header
+            offset = (len(line) - len(line.lstrip())) - starts[1]
+            values = [self.pending] + [line[start:end].strip() for start, end in _bounds(starts[1:], offset)]
+        else:
+            if len(line) < self.min_length:
+                return None
+            values = [line[start:end].strip() for start, end in self.bounds]
+        if len(self.keep) < len(values):
+            values = [values[i] for i in self.keep]
+        if self.empty:
+            values = ["" if value in self.empty else value for value in values]
+        return values
+
+
+def parse_table(output, templates):
+    """Parse output with whichever template's header it contains.
+
+    Returns (columns, rows) with rows as lists of values in column order, or
+    ([], []) if no header was found.
+    """
+    lines = iter(output.splitlines())
+    for line in lines:
+        found = _match_header(line, templates)
+        if found:
+            break
+    else:
+        return [], []
+    reader = RowReader(*found)
+    rows = []
+    for line in lines:
+        row = reader.read(line)
+        if reader.finished:
+            break
+        if row is not None:
+            rows.append(row)
+    return reader.columns, rows
+
+
+class TableStream:
+    """Push parser for a command's output, fed raw bytes as they arrive from the switch.
+
+    feed() decodes incrementally (a multi-byte character may be split across
+    chunks), splits lines across chunk boundaries and returns the rows each
+    chunk completes, so parsing overlaps with the network reads. Until the
+    platform is known the first DETECT_LINES lines are held back for
+    detection. close(output) returns (platform, columns, rows) like
+    parse_output, which it falls back to on output (the full text the caller
+    collected) for '| json' output or a header of another platform.
+    """
+
+    def __init__(self, command, host=None, platform=None, encoding="utf-8"):
+        self.command = command
+        self.host = host
+        self.platform = platform or _host_platforms.get(host)
+        self.columns = []
+        self.rows = []
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
+        self._partial = ""
+        self._head = []
+        self._reader = None
+
+    def feed(self, data):
+        """Add a chunk of raw output and return the rows it completed."""
+        text = self._decoder.decode(data)
+        if not text:
+            return []
+        before = len(self.rows)
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._line(line.rstrip("\r"))
+        return self.rows[before:]
+
+    def _line(self, line):
+        if self._reader is not None:
+            if not self._reader.finished:
+                row = self._reader.read(line)
+                if row is not None:
+                    self.rows.append(row)
+        elif self.platform is None:
+            self._head.append(line)
+            if len(self._head) >= DETECT_LINES:
+                self._detect()
+        else:
+            found = _match_header(line, templates_for(self.command, self.platform))
+            if found:
+                self._reader = RowReader(*found)
+                self.columns = self._reader.columns
+
+    def _detect(self):
+        head, self._head = self._head, []
+        self.platform = detect_platform("\n".join(head))
+        for line in head:
+            self._line(line)
+
+    def close(self, output=""):
+        """Finish the output and return (platform, columns, rows)."""
+        tail = self._decoder.decode(b"", final=True)
+        line, self._partial = self._partial + tail, ""
+        if line:
+            self._line(line.rstrip("\r"))
+        if self.platform is None:
+            self._detect()
+        if not self.columns:
+            return parse_output(self.command, output, self.host, self.platform)
+        if self.host is not None:
+            _host_platforms[self.host] = self.platform
+        return self.platform, self.columns, self.rows
+
+
+def register_json(command, platform, mapper):
+    """Add a mapper from a command's '| json' document to (columns, rows).
+
+    A mapper returns None if the document is not the one it understands.
+    """
+    JSON_MAPPERS.setdefault((command, platform), []).append(mapper)
+
+
+def json_document(output):
+    """Return the JSON document in '| json' output, or None for text output."""
+    match = JSON_START.search(output)
+    if not match:
+        return None
+    end = output.rfind("}")
+    try:
+        return json.loads(output[match.start():end + 1])
+    except ValueError:
+        return None
+
+
+def parse_output(command, output, host=None, platform=None):
+    """Parse the output of a command from any supported platform.
+
+    The platform is taken from the argument, from an earlier output of the same
+    host parsed in this process or detected from the first lines, and selects the templates directly.
+    Only if none of them finds its header are the other platforms' templates
+    tried. Output of '| json' commands goes through the platform's JSON
+    mappers instead of the templates. Returns (platform, columns, rows) with
+    the columns a subset of the command's schema and rows as lists of values.
+    """
+    platform = platform or _host_platforms.get(host) or detect_platform(output)
+    document = json_document(output)
+    if document is not None:
+        # Structured output maps straight onto the schema, no column slicing
+        for mapper in JSON_MAPPERS.get((command, platform), ()):
+            result = mapper(document)
+            if result is not None:
+                if host is not None:
+                    _host_platforms[host] = platform
+                return (platform,) + result
+    columns, rows = parse_table(output, templates_for(command, platform))
+    if not columns:
+        for other in PLATFORMS:
+            if other != platform:
+                columns, rows = parse_table(output, templates_for(command, other))
+                if columns:
+                    platform = other
+                    break
+    if columns and host is not None:
+        _host_platforms[host] = platform
+    return platform, columns, rows
+
+
+# show interface status (IOS and IOS-XE, NX-OS) / show interfaces status (EOS)
+_INTERFACE_STATUS_FIELDS = [
+    ("Port", ["Port"], False),
+    ("Name", ["Name"], False),
+    ("Status", ["Status"], False),
+    ("Vlan", ["Vlan"], False),
+    ("Duplex", ["Duplex"], False),
+    ("Speed", ["Speed"], False),
+    ("Type", ["Type"], False),
+]
+register("interface_status", "ios", table_template(_INTERFACE_STATUS_FIELDS))
+register("interface_status", "nxos", table_template(_INTERFACE_STATUS_FIELDS, empty=("--",)))
+register("interface_status", "eos", table_template(
+    _INTERFACE_STATUS_FIELDS + [(None, ["Flags"], True), (None, ["Encapsulation"], True)]))
+
+# show cdp neighbors
+_CDP_FIELDS = [
+    ("device_id", ["Device ID", "Device-ID", "Device Id"], False),
+    ("local_interface", ["Local Intrfce", "Local Interface"], False),
+    ("holdtime", ["Holdtme", "Hldtme", "Hold Time"], False),
+    ("capability", ["Capability"], False),
+    ("platform", ["Platform"], False),
+    ("port_id", ["Port ID", "Port Id"], False),
+]
+# show lldp neighbors (IOS, NX-OS)
+_LLDP_FIELDS = [
+    ("device_id", ["Device ID"], False),
+    ("local_interface", ["Local Intf"], False),
+    ("holdtime", ["Hold-time"], False),
+    ("capability", ["Capability"], False),
+    ("port_id", ["Port ID"], False),
+]
+for _platform in ("ios", "nxos"):
+    register("neighbors", _platform, table_template(_CDP_FIELDS, wrapped=True))
+    register("neighbors", _platform, table_template(_LLDP_FIELDS, wrapped=True))
+# show lldp neighbors (EOS, which has no CDP)
+register("neighbors", "eos", table_template([
+    ("local_interface", ["Port"], False),
+    ("device_id", ["Neighbor Device ID"], False),
+    ("port_id", ["Neighbor Port ID"], False),
+    ("holdtime", ["TTL"], False),
+]))
+register("neighbors", "eos", table_template(_CDP_FIELDS, wrapped=True))
+
+
+def _nxos_rows(document, table, row):
+    # NX-OS wraps rows as {"TABLE_x": {"ROW_x": [...]}}, with a bare dict for one row
+    rows = (document.get(table) or {}).get(row, [])
+    return [rows] if isinstance(rows, dict) else rows
+
+
+def _text(value):
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return " ".join(str(item) for item in value)
+    return str(value)
+
+
+def nxos_interface_status(document):
+    """Map 'show interface status | json' from NX-OS."""
+    if "TABLE_interface" not in document:
+        return None
+    fields = ["interface", "name", "state", "vlan", "duplex", "speed", "type"]
+    rows = [[_text(row.get(field)) for field in fields] for row in _nxos_rows(document, "TABLE_interface", "ROW_interface")]
+    return INTERFACE_STATUS_COLUMNS, rows
+
+
+def _eos_speed(status):
+    bandwidth = status.get("bandwidth") or 0
+    if bandwidth >= 1000000000:
+        # 2.5G and other fractional speeds keep their decimals
+        speed = f"{bandwidth / 1e9:g}G"
+    elif bandwidth:
+        speed = f"{bandwidth / 1e6:g}M"
+    else:
+        speed = "auto"
+    return f"a-{speed}" if status.get("autoNegotiateActive") and bandwidth else speed
+
+
+def eos_interface_status(document):
+    """Map 'show interfaces status | json' from EOS."""
+    if "interfaceStatuses" not in document:
+        return None
+    rows = []
+    for port, status in document["interfaceStatuses"].items():
+        vlan_info = status.get("vlanInformation") or {}
+        mode = vlan_info.get("interfaceMode", "")
+        vlan = vlan_info.get("vlanId", "") if mode == "bridged" else mode
+        duplex = status.get("duplex", "")
+        duplex = duplex[len("duplex"):].lower() if duplex.startswith("duplex") else duplex
+        rows.append([port, status.get("description", ""), status.get("linkStatus", ""), _text(vlan), duplex,
+                     _eos_speed(status), status.get("interfaceType", "")])
+    return INTERFACE_STATUS_COLUMNS, rows
+
+
+def nxos_neighbors(document):
+    """Map 'show cdp neighbors | json' or 'show lldp neighbors | json' from NX-OS."""
+    if "TABLE_cdp_neighbor_brief_info" in document:
+        fields = ["device_id", "intf_id", "ttl", "capability", "platform_id", "port_id"]
+        rows = _nxos_rows(document, "TABLE_cdp_neighbor_brief_info", "ROW_cdp_neighbor_brief_info")
+        return NEIGHBOR_COLUMNS, [[_text(row.get(field)) for field in fields] for row in rows]
+    if "TABLE_nbor" in document:
+        fields = ["chassis_id", "l_port_id", "hold_time", "system_capability", "port_id"]
+        rows = _nxos_rows(document, "TABLE_nbor", "ROW_nbor")
+        return ["device_id", "local_interface", "holdtime", "capability", "port_id"], \
+            [[_text(row.get(field)) for field in fields] for row in rows]
+    return None
+
+
+def eos_neighbors(document):
+    """Map 'show lldp neighbors | json' from EOS."""
+    if "lldpNeighbors" not in document:
+        return None
+    fields = ["neighborDevice", "port", "ttl", "neighborPort"]
+    rows = [[_text(row.get(field)) for field in fields] for row in document["lldpNeighbors"]]
+    return ["device_id", "local_interface", "holdtime", "port_id"], rows
+
+
+register_json("interface_status", "nxos", nxos_interface_status)
+register_json("interface_status", "eos", eos_interface_status)
+register_json("neighbors", "nxos", nxos_neighbors)
+register_json("neighbors", "eos", eos_neighbors)
@@ -0,0 +1,54 @@
+import re
+import time
+
+
+def split_host_port(host, default_port=22):
+    """Split an inventory entry of the form host or host:port."""
+    # IPv6 addresses contain several colons and never carry a port here
+    if host.count(":") == 1:
+        name, port = host.split(":")
+        if port.isdigit():
+            return name, int(port)
+    return host, default_port
+
+
+def run_command(shell, command, stream=None, wait=2.0, quiet=0.5, poll=0.05):
+    """Send one command and read until the switch stops sending.
+
+    Output is read as soon as it arrives and fed to stream (a
+    cli_parsers.TableStream) chunk by chunk, so parsing overlaps with the
+    reads. Reading stops once at least wait seconds have passed and nothing
+    has arrived for quiet seconds. Chunks are joined and decoded once at the
+    end.
+    """
+    shell.send(command + '\n')
+    start = last = time.monotonic()
+    chunks = []
+    while True:
+        if shell.recv_ready():
+            data = shell.recv(65535)
+            chunks.append(data)
+            if stream is not None:
+                stream.feed(data)
+            last = time.monotonic()
+            continue
+        now = time.monotonic()
+        if now - start >= wait and now - last >= quiet:
+            break
+        time.sleep(poll)
+    return b"".join(chunks).decode(errors='ignore')
+
+
+def keep_sheet(parse, switch, result):
+    """Parse step for a streaming collector: its sheet is ready, only errors still need one."""
+    return parse(switch, result) if isinstance(result, str) else result
+
+
+def sheet_error(error_of, result):
+    """Error check for a streaming collector, whose successful results are sheets."""
+    return error_of(result) if isinstance(result, str) else None
+
+
+def excel_sheet_name(switch):
+    """Return a valid Excel sheet name (max 31 chars, no []:*?/\\) for a switch."""
+    return re.sub(r"[\[\]:*?/\\]", "_", str(switch))[:31]
@@ -0,0 +1,222 @@
+import heapq
+import itertools
+import json
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEFAULT_HEALTH_FILE = "host_health.json"
+
+# Errors that will not go away by trying again (and may lock the account if we do)
+NON_RETRYABLE_ERRORS = ("Authentication failed", "Bad authentication type")
+
+
+class HostHealth:
+    """Per-host failure tracking, retry backoff and circuit breaker state.
+
+    The state is persisted to a JSON file so hosts known to be dead are skipped
+    on the next run instead of costing a full connect timeout every time.
+    """
+
+    def __init__(self, state_file=DEFAULT_HEALTH_FILE, max_attempts=3, base_delay=2.0, max_delay=60.0,
+                 failure_threshold=3, cooldown=900.0, max_cooldown=86400.0, seed=None):
+        self.state_file = state_file
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.rng = random.Random(seed)
+        self.hosts = {}
+        self.failed_this_run = set()
+        self.load()
+
+    def load(self):
+        """Read the persisted host state, starting empty if there is none."""
+        if self.state_file and os.path.exists(self.state_file):
+            try:
+                with open(self.state_file) as f:
+                    self.hosts = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable host health file {self.state_file}: {e}")
+                self.hosts = {}
+
+    def save(self):
+        """Persist the host state for the next run."""
+        if not self.state_file:
+            return
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self.hosts, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, self.state_file)
+
+    def _entry(self, host):
+        return self.hosts.setdefault(host, {"failures": 0, "open_count": 0, "open_until": 0})
+
+    def is_open(self, host, now=None):
+        """Return True if the circuit for host is open and it should be skipped."""
+        entry = self.hosts.get(host)
+        return bool(entry) and entry.get("open_until", 0) > (now or time.time())
+
+    def partition(self, hosts):
+        """Split hosts into (hosts to poll, hosts skipped because their circuit is open)."""
+        now = time.time()
+        to_poll = [host for host in hosts if not self.is_open(host, now)]
+        skipped = [host for host in hosts if self.is_open(host, now)]
+        return to_poll, skipped
+
+    def attempts_for(self, host):
+        """Number of attempts allowed this run; a half-open circuit gets a single probe."""
+        entry = self.hosts.get(host)
+        if entry and entry.get("open_count", 0) > 0:
+            return 1
+        return self.max_attempts
+
+    def backoff(self, attempt):
+        """Exponential backoff with full jitter for the given retry attempt (0-based)."""
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def record_success(self, host, latency=None):
+        """Close the circuit for host and update its latency average."""
+        entry = self._entry(host)
+        entry.update(failures=0, open_count=0, open_until=0, last_success=time.time())
+        entry.pop("last_error", None)
+        if latency is not None:
+            previous = entry.get("latency")
+            entry["latency"] = latency if previous is None else 0.7 * previous + 0.3 * latency
+
+    def start_run(self):
+        """Start a new run; a host polled for several outputs in one run counts one failure at most."""
+        self.failed_this_run = set()
+
+    def record_failure(self, host, error):
+        """Count a failed run for host and open its circuit once the threshold is reached."""
+        entry = self._entry(host)
+        entry["last_failure"] = time.time()
+        entry["last_error"] = str(error)[:200]
+        if host in self.failed_this_run:
+            return
+        self.failed_this_run.add(host)
+        entry["failures"] += 1
+        if entry["failures"] >= self.failure_threshold:
+            # Each consecutive trip doubles the cooldown, up to max_cooldown
+            cooldown = min(self.max_cooldown, self.cooldown * 2 ** entry["open_count"])
+            entry["open_count"] += 1
+            entry["open_until"] = time.time() + cooldown
+
+    def describe(self, host):
+        """Return a short human-readable reason for skipping host."""
+        entry = self.hosts.get(host, {})
+        until = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.get("open_until", 0)))
+        return f"{entry.get('failures', 0)} consecutive failed runs, next attempt after {until} (last error: {entry.get('last_error', 'unknown')})"
+
+
+def _timed(collect, host):
+    start = time.monotonic()
+    result = collect(host)
+    return result, time.monotonic() - start
+
+
+class _PendingHosts:
+    """Hosts not started yet, in order, bucketed by the limits that apply to them.
+
+    Taking the next host looks at the head of each bucket rather than scanning
+    past every host held back by a limit.
+    """
+
+    def __init__(self, hosts, limits=None):
+        self.limits = limits
+        self.buckets = {}
+        self.count = 0
+        for index, host in enumerate(hosts):
+            key = limits.bucket(host) if limits is not None else None
+            self.buckets.setdefault(key, deque()).append((index, host))
+            self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def take(self):
+        """Return the first host that the limits allow now, or None."""
+        best = None
+        for bucket in self.buckets.values():
+            if bucket and (best is None or bucket[0][0] < best[0][0]):
+                if self.limits is None or self.limits.allows(bucket[0][1]):
+                    best = bucket
+        if best is None:
+            return None
+        self.count -= 1
+        return best.popleft()[1]
+
+
+def _take(pending, retries, now, limits):
+    # Next (host, attempt) to start: new hosts in order, then due retries
+    host = pending.take()
+    if host is not None:
+        return host, 0
+    if retries and retries[0][0] <= now and (limits is None or limits.allows(retries[0][2])):
+        _, _, host, attempt = heapq.heappop(retries)
+        return host, attempt
+    return None, None
+
+
+def collect_with_retries(hosts, collect, error_of, health, concurrency=1, limits=None):
+    """Run collect(host) for every host and yield (host, result) as each one finishes.
+
+    error_of(result) returns an error message for a failed result or None. Failed
+    hosts are put back on a retry heap with a backoff delay instead of being retried
+    in place, so the worker slots keep serving healthy hosts in the meantime.
+    Hosts are started in the given order, skipping over hosts that limits (a
+    scheduler.ConcurrencyLimits) does not allow yet.
+    """
+    pending = _PendingHosts(hosts, limits)
+    retries = []
+    order = itertools.count()
+    running = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while pending or retries or running:
+            now = time.monotonic()
+            while len(running) < concurrency:
+                host, attempt = _take(pending, retries, now, limits)
+                if host is None:
+                    break
+                if limits is not None:
+                    limits.acquire(host)
+                running[pool.submit(_timed, collect, host)] = (host, attempt)
+
+            timeout = None
+            # Wake up for the next retry; one that is already due but held back
+            # by a limit waits for a running host to finish instead
+            if retries and len(running) < concurrency and retries[0][0] > now:
+                timeout = retries[0][0] - now
+            if not running:
+                if timeout is None:
+                    # Nothing running can free a limit, so the rest can never start
+                    raise RuntimeError(f"Session limits allow none of the {len(pending) + len(retries)} remaining hosts to start")
+                time.sleep(timeout)
+                continue
+
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                host, attempt = running.pop(future)
+                if limits is not None:
+                    limits.release(host)
+                result, elapsed = future.result()
+                error = error_of(result)
+                if error is None:
+                    health.record_success(host, elapsed)
+                elif attempt + 1 < health.attempts_for(host) and not any(e in error for e in NON_RETRYABLE_ERRORS):
+                    delay = health.backoff(attempt)
+                    print(f"{host} failed ({error}); retrying in {delay:.1f}s")
+                    heapq.heappush(retries, (time.monotonic() + delay, next(order), host, attempt + 1))
+                    continue
+                else:
+                    health.record_failure(host, error)
+                yield host, result
+    health.save()
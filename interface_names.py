@@ -0,0 +1,81 @@
+import re
+from functools import lru_cache
+
+# (full name, short name, other spellings seen in CLI output)
+INTERFACE_TYPES = [
+    ("GigabitEthernet", "Gi", ["Gig", "GigE"]),
+    ("TenGigabitEthernet", "Te", ["Ten", "TenGigE"]),
+    ("TwentyFiveGigE", "Twe", ["TwentyFiveGigabitEthernet"]),
+    ("TwoGigabitEthernet", "Tw", ["TwoGigE"]),
+    ("FiveGigabitEthernet", "Fi", ["FiveGigE"]),
+    ("FortyGigabitEthernet", "Fo", ["For", "FortyGigE"]),
+    ("HundredGigE", "Hu", ["Hun", "HundredGigabitEthernet"]),
+    ("FastEthernet", "Fa", ["Fas"]),
+    ("Ethernet", "Eth", ["Et"]),
+    ("AppGigabitEthernet", "Ap", ["App"]),
+    ("Loopback", "Lo", ["Loop"]),
+    ("Tunnel", "Tu", ["Tun"]),
+    ("Vlan", "Vl", []),
+    ("mgmt", "mgmt", ["Management", "Ma"]),
+]
+
+# Only the listed spellings are accepted for these; generated prefixes such as
+# "Port" would also match the "Port 1" that IP phones report
+EXPLICIT_ONLY = {"Port-channel": ("Po", ["PortChannel", "Port-ch"])}
+
+
+def build_abbreviation_index():
+    """Map every accepted lowercase spelling of an interface type to its short name.
+
+    Besides the listed spellings, any prefix of a full name that is at least as
+    long as its short name and does not match another type is accepted, as on
+    the Cisco CLI ("Gigabit", "TenGig").
+    """
+    index = {}
+    full_names = [full.lower() for full, _, _ in INTERFACE_TYPES]
+    for full, short, aliases in INTERFACE_TYPES:
+        lower = full.lower()
+        for end in range(len(short), len(lower) + 1):
+            prefix = lower[:end]
+            if sum(name.startswith(prefix) for name in full_names) == 1:
+                index.setdefault(prefix, short)
+    for full, short, aliases in INTERFACE_TYPES:
+        for spelling in [full, short] + aliases:
+            index[spelling.lower()] = short
+    for full, (short, aliases) in EXPLICIT_ONLY.items():
+        for spelling in [full, short] + aliases:
+            index[spelling.lower()] = short
+    return index
+
+
+ABBREVIATIONS = build_abbreviation_index()
+
+
+@lru_cache(maxsize=65536)
+def canonical_interface(interface):
+    """Return the short form of an interface name, e.g. GigabitEthernet1/0/1 -> Gi1/0/1.
+
+    Names of unknown types are returned with their whitespace removed.
+    """
+    compact = re.sub(r"\s+", "", str(interface))
+    match = re.match(r"([A-Za-z-]+)(\d.*)", compact)
+    if not match:
+        return compact
+    prefix, rest = match.groups()
+    short = ABBREVIATIONS.get(prefix.lower())
+    return short + rest if short else compact
+
+
+def interface_key(interface):
+    """Return a comparison key for an interface name that ignores case, spacing and abbreviation."""
+    return canonical_interface(interface).lower()
+
+
+def interface_keys(names):
+    """Return interface_key for every value of a pandas Series.
+
+    Each distinct name is converted once, so a fleet-wide column with millions
+    of rows but a few thousand distinct port names stays cheap.
+    """
+    unique = names.dropna().unique()
+    return names.map({name: interface_key(name) for name in unique})
@@ -0,0 +1,242 @@
+import argparse
+import random
+import selectors
+import socket
+import threading
+import time
+import paramiko
+import synthetic_outputs
+
+
+class SwitchProfile:
+    """Behavior settings shared by every virtual switch in the farm."""
+
+    def __init__(self, username="admin", password="admin", latency=0.2, jitter=0.1,
+                 num_ports=48, failure_rate=0.0, hang_seconds=30.0, chunk_size=4096, seed=None):
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.num_ports = num_ports
+        self.failure_rate = failure_rate
+        self.hang_seconds = hang_seconds
+        self.chunk_size = chunk_size
+        self.rng = random.Random(seed)
+
+
+class MockSwitchServer(paramiko.ServerInterface):
+    """Paramiko server interface that accepts a password login and an interactive shell."""
+
+    def __init__(self, profile, fail_auth=False):
+        self.profile = profile
+        self.fail_auth = fail_auth
+        self.shell_requested = threading.Event()
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_auth_password(self, username, password):
+        if not self.fail_auth and username == self.profile.username and password == self.profile.password:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        self.shell_requested.set()
+        return True
+
+
+class VirtualSwitch:
+    """One emulated Cisco switch: its hostname, canned outputs and CLI loop."""
+
+    def __init__(self, hostname, port, profile, cdp_neighbors):
+        self.hostname = hostname
+        self.short_name = hostname.split(".")[0]
+        self.port = port
+        self.profile = profile
+        self.cdp_neighbors = cdp_neighbors
+        self._int_status = None
+        self._cdp = None
+
+    def command_output(self, command):
+        """Return the CLI response for a command, or None if it is not supported."""
+        if command.startswith("terminal length"):
+            return ""
+        if command.startswith("show int") and command.split()[-1].startswith("stat"):
+            if self._int_status is None:
+                text = synthetic_outputs.generate_interface_status(self.profile.num_ports, self.short_name, seed=self.port)
+                # Drop the echoed command and trailing prompt added by the generator
+                self._int_status = "\n".join(text.splitlines()[1:-1]) + "\n"
+            return self._int_status
+        if command.startswith("show cdp nei"):
+            if self._cdp is None:
+                text = synthetic_outputs.generate_cdp_neighbors(self.cdp_neighbors, self.short_name, header_variant=self.port, seed=self.port)
+                self._cdp = "\n".join(text.splitlines()[1:-1]) + "\n"
+            return self._cdp
+        return None
+
+    def send(self, channel, text):
+        """Send text in chunks using Cisco-style CRLF line endings."""
+        data = text.replace("\n", "\r\n").encode()
+        for start in range(0, len(data), self.profile.chunk_size):
+            channel.sendall(data[start:start + self.profile.chunk_size])
+
+    def run_shell(self, channel):
+        """Emulate the banner, prompt and command handling of an IOS exec session."""
+        prompt = f"{self.short_name}#"
+        self.send(channel, f"\n{self.short_name} - authorized access only\n\n{prompt}")
+        buffer = ""
+        while True:
+            data = channel.recv(1024)
+            if not data:
+                break
+            buffer += data.decode(errors="ignore")
+            while "\n" in buffer or "\r" in buffer:
+                line, _, buffer = buffer.replace("\r\n", "\n").replace("\r", "\n").partition("\n")
+                command = line.strip()
+                self.send(channel, command + "\n")
+                if command in ("exit", "quit", "logout"):
+                    return
+                if not command:
+                    self.send(channel, prompt)
+                    continue
+                delay = self.profile.latency + self.profile.rng.uniform(-self.profile.jitter, self.profile.jitter)
+                time.sleep(max(0.0, delay))
+                output = self.command_output(command)
+                if output is None:
+                    output = "                    ^\n% Invalid input detected at '^' marker.\n\n"
+                self.send(channel, output + prompt)
+
+
+class SwitchFarm:
+    """A set of virtual switches listening on consecutive localhost ports."""
+
+    def __init__(self, num_devices, profile=None, base_port=2200, bind_address="127.0.0.1", seed=None):
+        self.profile = profile or SwitchProfile(seed=seed)
+        self.bind_address = bind_address
+        self.host_key = paramiko.RSAKey.generate(2048)
+        fleet = synthetic_outputs.generate_fleet(num_devices, seed=seed)
+        self.switches = {}
+        for i, (hostname, neighbors) in enumerate(fleet.items()):
+            port = base_port + i
+            self.switches[port] = VirtualSwitch(hostname, port, self.profile, neighbors)
+        self._selector = selectors.DefaultSelector()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def inventory(self):
+        """Return the 'host:port' entries for every virtual switch."""
+        return [f"{self.bind_address}:{port}" for port in self.switches]
+
+    def write_inventory(self, csv_file):
+        """Write an inventory CSV the collectors can read with get_switch_list."""
+        with open(csv_file, "w") as f:
+            for entry in self.inventory():
+                f.write(entry + "\n")
+
+    def start(self):
+        """Bind all listening sockets and serve connections in a background thread."""
+        for port in self.switches:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self.bind_address, port))
+            sock.listen(128)
+            sock.setblocking(False)
+            self._selector.register(sock, selectors.EVENT_READ, port)
+        self._thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop accepting connections and close the listening sockets."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        for key in list(self._selector.get_map().values()):
+            self._selector.unregister(key.fileobj)
+            key.fileobj.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            for key, _ in self._selector.select(timeout=0.2):
+                try:
+                    conn, _ = key.fileobj.accept()
+                except BlockingIOError:
+                    continue
+                conn.setblocking(True)
+                threading.Thread(target=self._handle, args=(conn, self.switches[key.data]), daemon=True).start()
+
+    def _handle(self, conn, switch):
+        """Run one SSH session, injecting the configured failure modes."""
+        profile = self.profile
+        failure = None
+        if profile.rng.random() < profile.failure_rate:
+            failure = profile.rng.choice(["refuse", "auth", "hang"])
+        if failure == "refuse":
+            conn.close()
+            return
+        transport = paramiko.Transport(conn)
+        transport.add_server_key(self.host_key)
+        server = MockSwitchServer(profile, fail_auth=(failure == "auth"))
+        try:
+            transport.start_server(server=server)
+            channel = transport.accept(20)
+            if channel is None or not server.shell_requested.wait(10):
+                return
+            if failure == "hang":
+                # Accept the session but stay silent, like a wedged control plane,
+                # then drop it so clients without a read timeout are not stuck forever
+                deadline = time.monotonic() + profile.hang_seconds
+                while transport.is_active() and not self._stop.is_set() and time.monotonic() < deadline:
+                    time.sleep(0.5)
+                return
+            switch.run_shell(channel)
+        except Exception:
+            pass
+        finally:
+            transport.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local farm of mock Cisco switches reachable over SSH.")
+    parser.add_argument("--devices", type=int, default=100, help="Number of virtual switches")
+    parser.add_argument("--base-port", type=int, default=2200, help="TCP port of the first switch")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before each command answers")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Random +/- seconds added to the latency")
+    parser.add_argument("--ports", type=int, default=48, help="Interfaces in 'show interface status' output")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of sessions that refuse, fail auth or hang")
+    parser.add_argument("--hang-seconds", type=float, default=30.0, help="How long a hung session stays silent before closing")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--inventory", default="mock_switches.csv", help="CSV file to write the host:port list to")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    profile = SwitchProfile(args.username, args.password, args.latency, args.jitter,
+                            args.ports, args.failure_rate, args.hang_seconds, seed=args.seed)
+    farm = SwitchFarm(args.devices, profile, args.base_port, seed=args.seed)
+    farm.write_inventory(args.inventory)
+    with farm:
+        print(f"Serving {args.devices} mock switches on 127.0.0.1:{args.base_port}-{args.base_port + args.devices - 1}")
+        print(f"Inventory written to {args.inventory}. Press Ctrl+C to stop.")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import argparse
+import sys
+
+# Each subcommand names the module whose main() it runs. Modules are imported
+# only once a subcommand is chosen, so '--help' and argument errors never load
+# pandas, paramiko, networkx or pyvis.
+COMMANDS = {
+    "collect": ("show_int_status_parser", "Collect and parse 'show interface status' from switches"),
+    "cdp": ("cdp_plotter", "Collect CDP/LLDP neighbors and plot the network"),
+    "count": ("active_ports_speed_type_counter", "Count active ports by speed and type from interface status workbooks"),
+    "ports": ("port_inventory", "Join interface status and CDP neighbors into a per-port inventory"),
+    "batch": ("batch_runner", "Run the collectors without prompts from a JSON config (arguments are passed through)"),
+}
+
+
+def run_command(name, args=()):
+    """Import the module behind a subcommand and run its main() with args as its command line."""
+    module_name = COMMANDS[name][0]
+    module = __import__(module_name)
+    sys.argv = [f"{module_name}.py"] + list(args)
+    return module.main()
+
+
+def main():
+    # batch_runner parses its own options, including --help
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        return run_command("batch", sys.argv[2:])
+
+    parser = argparse.ArgumentParser(description="Network analysis and visualization tools.")
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+    subparsers.required = True
+    for name, (_, description) in COMMANDS.items():
+        subparsers.add_parser(name, help=description, description=description)
+    args = parser.parse_args()
+    return run_command(args.command)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from host_health import collect_with_retries
+
+_DONE = object()
+
+# The pool starts its workers on the first submit, from a parse thread, while
+# SSH threads are running. Forking then could copy a lock one of them holds
+# into the child, so workers come from a fork server (or are spawned where
+# there is none) instead.
+_POOL_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+
+class _Stop(Exception):
+    """Raised inside a stage when another stage has failed."""
+
+
+def _put(q, item, stop):
+    """Put item on a bounded queue, giving up if the pipeline is stopping."""
+    while True:
+        if stop.is_set():
+            raise _Stop()
+        try:
+            q.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+
+def _get(q, stop):
+    """Take the next item off a queue, giving up if the pipeline is stopping."""
+    while True:
+        if stop.is_set():
+            raise _Stop()
+        try:
+            return q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+
+
+def run_pipeline(hosts, fetch, parse, write, error_of, health, network_workers=8, parse_workers=2,
+                 queue_size=32, use_processes=True, limits=None):
+    """Collect, parse and write hosts in three overlapping stages.
+
+    - fetch(host) runs on network_workers threads (with retries and the circuit
+      breaker from host_health) and returns the raw output; error_of(raw) says
+      whether it failed. Hosts start in the given order within the session caps
+      of limits (a scheduler.ConcurrencyLimits), if any.
+    - parse(host, raw) runs on a pool of parse_workers processes, so it must be a
+      picklable module-level function. With use_processes=False it runs on threads.
+    - write(host, result) runs on a single writer thread, in completion order.
+
+    The queues between the stages hold at most queue_size items, so a slow writer
+    holds back parsing and a slow parser holds back new SSH sessions instead of
+    letting raw output pile up in memory. The first error in any stage stops the
+    pipeline and is re-raised here.
+    """
+    parse_workers = max(1, parse_workers)
+    raw_queue = queue.Queue(maxsize=queue_size)
+    parsed_queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+
+    def guarded(stage):
+        def run():
+            try:
+                stage()
+            except _Stop:
+                pass
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+        return run
+
+    def collect_stage():
+        for host, raw in collect_with_retries(hosts, fetch, error_of, health, network_workers, limits):
+            _put(raw_queue, (host, raw), stop)
+        for _ in range(parse_workers):
+            _put(raw_queue, _DONE, stop)
+
+    pool = ProcessPoolExecutor(max_workers=parse_workers, mp_context=_POOL_CONTEXT) if use_processes else None
+
+    def parse_stage():
+        while True:
+            item = _get(raw_queue, stop)
+            if item is _DONE:
+                _put(parsed_queue, _DONE, stop)
+                return
+            host, raw = item
+            result = pool.submit(parse, host, raw).result() if pool else parse(host, raw)
+            _put(parsed_queue, (host, result), stop)
+
+    def write_stage():
+        remaining = parse_workers
+        while remaining:
+            item = _get(parsed_queue, stop)
+            if item is _DONE:
+                remaining -= 1
+                continue
+            write(*item)
+
+    threads = [threading.Thread(target=guarded(collect_stage), name="collect")]
+    threads += [threading.Thread(target=guarded(parse_stage), name=f"parse-{i}") for i in range(parse_workers)]
+    threads.append(threading.Thread(target=guarded(write_stage), name="write"))
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        if pool:
+            pool.shutdown()
+    if errors:
+        raise errors[0]
@@ -0,0 +1,167 @@
+import os
+import time
+import pandas as pd
+from collector_common import excel_sheet_name
+from interface_names import interface_keys
+
+PORT_COLUMNS = ["Switch", "Port", "Name", "Status", "Vlan", "Duplex", "Speed", "Type"]
+NEIGHBOR_FIELDS = {
+    "device_id": "Neighbor",
+    "port_id": "Neighbor Port",
+    "platform": "Neighbor Platform",
+    "capability": "Neighbor Capability",
+}
+JOIN_KEYS = ["_switch", "_port"]
+
+# Rows per Excel sheet, less the header row
+EXCEL_MAX_ROWS = 1048575
+
+
+def switch_keys(switches):
+    """Return a join key for every switch name in a Series.
+
+    Interface sheets read back from a workbook are named with excel_sheet_name,
+    so both sides go through it before comparing.
+    """
+    unique = switches.dropna().unique()
+    return switches.map({switch: excel_sheet_name(switch).lower() for switch in unique})
+
+
+def interface_table(interface_sheets):
+    """Stack {switch: interface status DataFrame} into one table with a Switch column."""
+    frames = {switch: df for switch, df in interface_sheets.items() if "Port" in df.columns}
+    if not frames:
+        return pd.DataFrame(columns=PORT_COLUMNS)
+    # One keyed concat instead of adding a column to every sheet first
+    ports = pd.concat(frames, names=["Switch", None]).reset_index(level="Switch").reset_index(drop=True)
+    return ports[[column for column in PORT_COLUMNS if column in ports.columns]]
+
+
+def neighbor_table(all_neighbors):
+    """Return the CDP neighbors keyed by switch and local port, one row per port.
+
+    Ports with several neighbors (hubs, hosts running CDP behind a phone) have
+    their neighbor fields joined with ', ' and are counted in Neighbors.
+    """
+    neighbors = pd.DataFrame({
+        "_switch": switch_keys(all_neighbors["source_switch"]),
+        "_port": interface_keys(all_neighbors["local_interface"]),
+        "Local Interface": all_neighbors["local_interface"],
+        "Source Switch": all_neighbors["source_switch"],
+    })
+    for field, column in NEIGHBOR_FIELDS.items():
+        neighbors[column] = all_neighbors[field].astype(str) if field in all_neighbors.columns else ""
+    neighbors["Neighbors"] = 1
+
+    # Only the ports seen more than once need the (slow) string aggregation
+    shared = neighbors.duplicated(JOIN_KEYS, keep=False)
+    if shared.any():
+        aggregations = {column: ", ".join for column in NEIGHBOR_FIELDS.values()}
+        aggregations.update({"Local Interface": "first", "Source Switch": "first", "Neighbors": "sum"})
+        # dropna=False keeps neighbors whose port could not be read
+        grouped = neighbors[shared].groupby(JOIN_KEYS, sort=False, dropna=False).agg(aggregations).reset_index()
+        neighbors = pd.concat([neighbors[~shared], grouped], ignore_index=True)
+    return neighbors
+
+
+def join_ports(interface_sheets, all_neighbors):
+    """Join interface status with CDP neighbors into one fleet-wide per-port table.
+
+    Ports are matched on switch and normalized interface name, so Gi1/0/1 in
+    the interface status meets Gig 1/0/1 in the CDP output. Returns (ports,
+    unmatched), where unmatched lists neighbors seen on ports missing from the
+    interface status (switches not polled for it, management ports).
+    """
+    ports = interface_table(interface_sheets)
+    ports["_switch"] = switch_keys(ports["Switch"])
+    ports["_port"] = interface_keys(ports["Port"].astype(str))
+    if all_neighbors is None or all_neighbors.empty:
+        for column in NEIGHBOR_FIELDS.values():
+            ports[column] = ""
+        ports["Neighbors"] = 0
+        return ports.drop(columns=JOIN_KEYS), pd.DataFrame(columns=["Source Switch", "Local Interface"] + list(NEIGHBOR_FIELDS.values()))
+
+    neighbors = neighbor_table(all_neighbors)
+    # Hash join on the normalized keys; a left join keeps the interface status order
+    merged = ports.merge(neighbors, on=JOIN_KEYS, how="left", sort=False, validate="many_to_one")
+    merged[list(NEIGHBOR_FIELDS.values())] = merged[list(NEIGHBOR_FIELDS.values())].fillna("")
+    merged["Neighbors"] = merged["Neighbors"].fillna(0).astype(int)
+    merged = merged.drop(columns=JOIN_KEYS + ["Source Switch", "Local Interface"])
+
+    matched = pd.MultiIndex.from_frame(neighbors[JOIN_KEYS]).isin(pd.MultiIndex.from_frame(ports[JOIN_KEYS]))
+    unmatched = neighbors.loc[~matched, ["Source Switch", "Local Interface"] + list(NEIGHBOR_FIELDS.values())]
+    unmatched = unmatched.reset_index(drop=True)
+    return merged, unmatched
+
+
+def write_port_inventory(ports, unmatched, output_file):
+    """Write the port inventory to Excel, or to CSV if it has too many rows for a sheet."""
+    if len(ports) > EXCEL_MAX_ROWS:
+        base = os.path.splitext(output_file)[0]
+        ports.to_csv(f"{base}.csv", index=False)
+        unmatched.to_csv(f"{base}_unmatched.csv", index=False)
+        return [f"{base}.csv", f"{base}_unmatched.csv"]
+    with pd.ExcelWriter(output_file, engine="xlsxwriter") as writer:
+        ports.to_excel(writer, sheet_name="Ports", index=False)
+        unmatched.to_excel(writer, sheet_name="Unmatched_Neighbors", index=False)
+    return [output_file]
+
+
+def read_interface_workbook(input_file):
+    """Read an interface status workbook into {sheet name: DataFrame}."""
+    return {sheet: df for sheet, df in pd.read_excel(input_file, sheet_name=None).items() if "Port" in df.columns}
+
+
+def read_cdp_workbook(input_file):
+    """Read the per-switch sheets of a CDP neighbors workbook into one DataFrame.
+
+    All_Connections lists each link once, from one end only, so the per-switch
+    sheets are used to see every switch's own local interface.
+    """
+    frames = [df for sheet, df in pd.read_excel(input_file, sheet_name=None).items()
+              if sheet != "All_Connections" and {"source_switch", "device_id", "local_interface"} <= set(df.columns)]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def main():
+    output_dir = "int_parsed_outputs"
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+        print(f"Created output directory: {output_dir}")
+
+    interface_file = input('Enter the path to the interface status Excel file: ')
+    cdp_file = input('Enter the path to the CDP neighbors Excel file: ')
+
+    # Same naming scheme as the port counter: the part before the first underscore
+    output_prefix = os.path.splitext(os.path.basename(interface_file))[0].split('_')[0]
+    current_date = time.strftime("%Y%m%d")
+    output_base = os.path.join(output_dir, f"{output_prefix}_port_inventory_{current_date}")
+    seq_num = 1
+    output_file = f"{output_base}.xlsx"
+    while os.path.exists(output_file):
+        seq_num += 1
+        output_file = f"{output_base}_{seq_num}.xlsx"
+
+    try:
+        interface_sheets = read_interface_workbook(interface_file)
+        all_neighbors = read_cdp_workbook(cdp_file)
+    except Exception as e:
+        print(f"Error reading input file: {e}")
+        return
+
+    if not interface_sheets:
+        print("No valid data found in the interface status file. Make sure it contains sheets with a 'Port' column.")
+        return
+
+    ports, unmatched = join_ports(interface_sheets, all_neighbors)
+    print(f"Joined {len(ports)} ports from {len(interface_sheets)} switches; "
+          f"{int((ports['Neighbors'] > 0).sum())} have CDP neighbors, {len(unmatched)} neighbors are on ports not in the interface status")
+
+    try:
+        for written in write_port_inventory(ports, unmatched, output_file):
+            print(f"Output written to: {written}")
+    except Exception as e:
+        print(f"Error writing output file: {e}")
+
+if __name__ == "__main__":
+    main()
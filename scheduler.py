@@ -0,0 +1,179 @@
+import ipaddress
+import math
+import re
+from collections import Counter
+
+# Latency estimates within this factor of each other share a band, inside
+# which credential groups take turns
+LATENCY_BAND = 1.25
+
+
+def site_key(host):
+    """Guess the site of an inventory entry (host or host:port).
+
+    IPv4 addresses are grouped by /24 and IPv6 by /64. Names are grouped by
+    the first label up to its first '-' ("bldg7-sw01.example.com" -> "bldg7"),
+    or by its leading letters if it has no '-' ("nyc01" -> "nyc").
+    """
+    name = str(host).rsplit(":", 1)[0] if str(host).count(":") == 1 else str(host)
+    try:
+        address = ipaddress.ip_address(name)
+    except ValueError:
+        label = name.split(".")[0].lower()
+        match = re.match(r"[^-]+(?=-)|[a-z]+", label)
+        return match.group(0) if match else label
+    if address.version == 4:
+        return str(ipaddress.ip_network(f"{address}/24", strict=False))
+    return str(ipaddress.ip_network(f"{address}/64", strict=False))
+
+
+def dedupe_groups(groups):
+    """Merge [(group name, hosts)] into (hosts, {host: group name}).
+
+    Hosts are compared ignoring case and surrounding whitespace. A host listed
+    in several groups keeps the first group (and so its credentials) and its
+    first spelling; later entries are reported and dropped.
+    """
+    hosts = []
+    group_of = {}
+    seen = {}
+    for name, group_hosts in groups:
+        for host in group_hosts:
+            host = host.strip()
+            key = host.lower()
+            if key in seen:
+                print(f"Skipping duplicate entry {host} in {name} (already listed in {group_of[seen[key]]})")
+                continue
+            seen[key] = host
+            group_of[host] = name
+            hosts.append(host)
+    return hosts, group_of
+
+
+def schedule_hosts(hosts, group_of, health):
+    """Order hosts for polling: historically slowest first, groups interleaved.
+
+    Starting the longest sessions first keeps them from trailing at the end of
+    the run. Hosts without a latency history are estimated at the median.
+    Within a band of similar estimates (see LATENCY_BAND) the hosts alternate
+    between credential groups, so one group's hosts (and its AAA server) are
+    not all hit back to back.
+    """
+    known = sorted(entry["latency"] for entry in (health.hosts.get(host) for host in hosts)
+                   if entry and entry.get("latency") is not None)
+    default = known[len(known) // 2] if known else 0.0
+    rank = Counter()
+    keyed = []
+    for host in hosts:
+        entry = health.hosts.get(host) or {}
+        latency = entry.get("latency")
+        estimate = latency if latency is not None else default
+        band = math.floor(math.log(max(estimate, 0.01), LATENCY_BAND))
+        bucket = (group_of.get(host), band)
+        keyed.append((-band, rank[bucket], -estimate, host))
+        rank[bucket] += 1
+    return [host for *_, host in sorted(keyed, key=lambda item: item[:3])]
+
+
+def check_limit(name, limit):
+    """Reject a session cap that would never let a host start."""
+    if limit is not None and (not isinstance(limit, int) or limit < 1):
+        raise ValueError(f"Session limit {name} must be a whole number of at least 1, not {limit!r}")
+
+
+class ConcurrencyLimits:
+    """Caps on simultaneous sessions per credential group and per site.
+
+    A limit of None leaves that dimension uncapped. group_limits and
+    site_limits can override the cap for individual groups and sites.
+    """
+
+    def __init__(self, group_of, per_group=None, per_site=None, site_of=None, group_limits=None, site_limits=None):
+        overrides = list((group_limits or {}).items()) + list((site_limits or {}).items())
+        for name, limit in [("per_group", per_group), ("per_site", per_site)] + overrides:
+            check_limit(name, limit)
+        self.group_of = group_of
+        self.per_group = per_group
+        self.per_site = per_site
+        self.site_of = dict(site_of or {})
+        self.group_limits = group_limits or {}
+        self.site_limits = site_limits or {}
+        self.running = Counter()
+
+    def bucket(self, host):
+        """The (credential group, site) whose caps apply to host."""
+        site = self.site_of.get(host)
+        if site is None:
+            site = self.site_of[host] = site_key(host)
+        return self.group_of.get(host), site
+
+    def _keys(self, host):
+        group, site = self.bucket(host)
+        return [(("group", group), self.group_limits.get(group, self.per_group)), (("site", site), self.site_limits.get(site, self.per_site))]
+
+    def allows(self, host):
+        """Whether another session to host stays within the caps."""
+        return all(limit is None or self.running[key] < limit for key, limit in self._keys(host))
+
+    def acquire(self, host):
+        for key, _ in self._keys(host):
+            self.running[key] += 1
+
+    def release(self, host):
+        for key, _ in self._keys(host):
+            self.running[key] -= 1
+
+
+def split_limits(limits, shards):
+    """Divide the caps of limits between shards (lists of hosts) collected side by side.
+
+    Returns one (group caps, site caps) pair per shard, with each cap shared
+    out over the shards its hosts are spread across so that together they
+    stay within it. Raises ValueError if a cap is lower than that number of
+    shards.
+    """
+    spread = {}
+    for index, shard in enumerate(shards):
+        for host in shard:
+            for key, limit in limits._keys(host):
+                if limit is not None:
+                    spread.setdefault(key, (limit, set()))[1].add(index)
+    caps = [({}, {}) for _ in shards]
+    for (kind, name), (limit, indexes) in spread.items():
+        if limit < len(indexes):
+            raise ValueError(f"The session limit of {limit} for {kind} {name} is lower than the {len(indexes)} shards "
+                             f"its switches are spread over; raise the limit, use fewer shards or shard by region")
+        share, extra = divmod(limit, len(indexes))
+        for i, index in enumerate(sorted(indexes)):
+            caps[index][0 if kind == "group" else 1][name] = share + (1 if i < extra else 0)
+    return caps
+
+
+def parse_limits(text):
+    """Parse 'group,site' session caps such as '4,2', '4' or ',2' into (per group, per site).
+
+    A blank part leaves that cap off. Raises ValueError for anything that is
+    not a whole number of at least 1.
+    """
+    if text.count(",") > 1:
+        raise ValueError(f"Expected at most two session limits, not {text!r}")
+    parts = (text.split(",") + [""])[:2]
+    limits = []
+    for name, part in zip(("per CSV file", "per site"), parts):
+        try:
+            limit = int(part) if part.strip() else None
+        except ValueError:
+            raise ValueError(f"Session limit {name} must be a whole number of at least 1, not {part.strip()!r}") from None
+        check_limit(name, limit)
+        limits.append(limit)
+    return tuple(limits)
+
+
+def prompt_limits():
+    """Ask for the per CSV file and per site session caps until the answer parses."""
+    while True:
+        text = input("Maximum concurrent sessions per CSV file and per site (e.g. 4,2) or press Enter for no limit: ")
+        try:
+            return parse_limits(text)
+        except ValueError as e:
+            print(e)
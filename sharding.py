@@ -0,0 +1,186 @@
+import multiprocessing
+import os
+import queue
+import socket
+import time
+import zlib
+from multiprocessing.managers import BaseManager
+
+# Workers on other machines authenticate with this shared key
+AUTHKEY_ENV = "NETWORK_AUTO_AUTHKEY"
+SHARD_BY = ("hash", "region")
+# Seconds a worker may hold a shard before the coordinator gives up on it
+SHARD_TIMEOUT = 3600
+
+_tasks = queue.Queue()
+_results = queue.Queue()
+
+
+def _get_tasks():
+    return _tasks
+
+
+def _get_results():
+    return _results
+
+
+class ShardManager(BaseManager):
+    """Serves the task and result queues shared by the coordinator and its workers."""
+
+
+ShardManager.register("tasks", callable=_get_tasks)
+ShardManager.register("results", callable=_get_results)
+
+
+def parse_address(text, default_host="127.0.0.1"):
+    """Parse 'host:port' (or just 'port') into a (host, port) tuple."""
+    host, _, port = str(text).rpartition(":")
+    return host or default_host, int(port)
+
+
+def split_shards(hosts, shards, by="hash"):
+    """Split [(host, region)] into a list of host lists.
+
+    by="region" gives one shard per region, so a site is polled from one place;
+    by="hash" spreads hosts over shards by a stable hash of the host name.
+    """
+    if by not in SHARD_BY:
+        raise ValueError(f"Unknown shard method {by}; expected one of {', '.join(SHARD_BY)}")
+    groups = {}
+    for host, region in hosts:
+        key = region if by == "region" else zlib.crc32(host.encode()) % max(1, shards)
+        groups.setdefault(key, []).append(host)
+    return list(groups.values())
+
+
+class ShardCoordinator:
+    """Hand shards of the inventory to worker processes and gather their results.
+
+    The queues are served over a multiprocessing manager, so workers can run
+    as local processes (local_workers) or on other machines that connect to
+    address with the same authkey. worker(address, authkey, *worker_args) is
+    the target of the local worker processes.
+
+    Workers report when they take a shard. A shard that no worker has taken
+    within the timeout, whose worker has not answered within the timeout of
+    taking it, or whose local worker process died, is reported as
+    {"error": message}; a late answer for it is ignored, and a worker that
+    finds it on the queue after its deadline skips it.
+    """
+
+    def __init__(self, address=("127.0.0.1", 0), authkey=None, local_workers=0, worker=None, worker_args=()):
+        self.authkey = authkey or os.urandom(16)
+        self.manager = ShardManager(address=address, authkey=self.authkey)
+        self.manager.start()
+        self.address = self.manager.address
+        self.tasks = self.manager.tasks()
+        self.results = self.manager.results()
+        self.next_id = 0
+        self.worker = worker
+        self.worker_args = tuple(worker_args)
+        self.processes = [self._start_worker(i) for i in range(local_workers)]
+
+    def _start_worker(self, number):
+        # Not daemonic: workers start their own parser process pools
+        process = multiprocessing.Process(target=self.worker, args=(self.address, self.authkey) + self.worker_args,
+                                          name=f"shard-worker-{number}")
+        process.start()
+        return process
+
+    def run(self, shards, poll=1.0, timeout=SHARD_TIMEOUT):
+        """Queue every shard and return the workers' results in shard order."""
+        for number, process in enumerate(self.processes):
+            if not process.is_alive():
+                print(f"Restarting shard worker {process.name} (exit code {process.exitcode})")
+                self.processes[number] = self._start_worker(number)
+        ids = []
+        queued = time.monotonic()
+        for shard in shards:
+            ids.append(self.next_id)
+            expires = time.time() + timeout if timeout is not None else None
+            self.tasks.put((self.next_id, shard, expires))
+            self.next_id += 1
+        if not self.processes:
+            print(f"Waiting for workers on {self.address[0]}:{self.address[1]}...")
+        results = {}
+        started = {}
+        while len(results) < len(ids):
+            try:
+                task_id, state, value = self.results.get(timeout=poll)
+            except queue.Empty:
+                pass
+            else:
+                if task_id in ids and task_id not in results:
+                    if state == "started":
+                        started[task_id] = (value, time.monotonic())
+                    else:
+                        results[task_id] = value
+            self._expire(ids, queued, started, results, timeout)
+        return [results[task_id] for task_id in ids]
+
+    def _expire(self, ids, queued, started, results, timeout):
+        """Fail the unfinished shards that timed out or whose worker died."""
+        local = {process.name: process for process in self.processes}
+        all_exited = bool(self.processes) and not any(process.is_alive() for process in self.processes)
+        now = time.monotonic()
+        for task_id in ids:
+            if task_id in results:
+                continue
+            if task_id not in started:
+                if all_exited:
+                    results[task_id] = {"error": "all local shard workers have exited"}
+                elif timeout is not None and now - queued > timeout:
+                    results[task_id] = {"error": f"no worker took the shard within {timeout} seconds"}
+                continue
+            worker, since = started[task_id]
+            if worker in local and not local[worker].is_alive():
+                results[task_id] = {"error": f"worker {worker} exited"}
+            elif timeout is not None and now - since > timeout:
+                results[task_id] = {"error": f"worker {worker} did not finish within {timeout} seconds"}
+
+    def close(self, timeout=10):
+        """Stop the local workers and the queue server."""
+        for _ in self.processes:
+            self.tasks.put(None)
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self.manager.shutdown()
+
+
+def run_worker(address, authkey, handle):
+    """Take shards off the coordinator's queue and put back handle(shard) until told to stop.
+
+    A shard that raises is reported as {"error": message} instead of stopping
+    the worker, and one taken after its deadline is skipped. The worker also
+    exits when the coordinator goes away.
+    """
+    # Local workers are known to the coordinator by their process name
+    name = multiprocessing.current_process().name
+    if name == "MainProcess":
+        name = f"{socket.gethostname()}:{os.getpid()}"
+    manager = ShardManager(address=tuple(address), authkey=authkey)
+    manager.connect()
+    tasks = manager.tasks()
+    results = manager.results()
+    while True:
+        try:
+            item = tasks.get()
+        except (EOFError, ConnectionError):
+            break
+        if item is None:
+            break
+        task_id, shard, expires = item
+        if expires is not None and time.time() > expires:
+            # The coordinator has already given up on this shard
+            continue
+        try:
+            results.put((task_id, "started", name))
+            try:
+                result = handle(shard)
+            except Exception as e:
+                result = {"error": f"{type(e).__name__}: {e}"}
+            results.put((task_id, "done", result))
+        except (EOFError, ConnectionError):
+            break
@@ -1,20 +1,29 @@
 import csv
+import functools
 import getpass
 import os
-import re
 import time
 import pandas as pd
-import paramiko
+from cli_parsers import INTERFACE_STATUS_COLUMNS, TableStream, json_document, parse_output
+from collector_common import excel_sheet_name, keep_sheet, run_command, sheet_error, split_host_port
+from host_health import HostHealth
+from pipeline import run_pipeline
+from scheduler import ConcurrencyLimits, dedupe_groups, prompt_limits, schedule_hosts
 
 def get_switch_list(csv_file):
     with open(csv_file, newline='') as f:
-        return [row[0] for row in csv.reader(f) if row]
+        return [row[0].strip() for row in csv.reader(f) if row and row[0].strip()]
 
-def get_interface_status_via_shell(host, username, password):
+def get_interface_status_via_shell(host, username, password, structured=False, stream=None):
+    # structured=True asks for '| json' output first (NX-OS, EOS) and falls
+    # back to the text table in the same session where the switch refuses it.
+    # A cli_parsers.TableStream passed as stream parses rows while they arrive
+    import paramiko  # Imported on first use to keep startup fast
     try:
         client = paramiko.SSHClient()
         client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        client.connect(host, username=username, password=password, look_for_keys=False, allow_agent=False, timeout=10)
+        hostname, port = split_host_port(host)
+        client.connect(hostname, port=port, username=username, password=password, look_for_keys=False, allow_agent=False, timeout=10)
         shell = client.invoke_shell()
         time.sleep(1)
         shell.recv(10000)  # Clear banner
@@ -23,98 +32,49 @@ def get_interface_status_via_shell(host, username, password):
         time.sleep(1)
         shell.recv(10000)  # Clear after terminal length 0
 
-        shell.send('show interface status\n')
-        time.sleep(2)
-        output = ""
-        while shell.recv_ready():
-            output += shell.recv(65535).decode(errors='ignore')
-            time.sleep(0.5)
+        output = run_command(shell, 'show interface status | json', stream) if structured else ""
+        if json_document(output) is None:
+            output = run_command(shell, 'show interface status', stream)
         client.close()
         return output
     except Exception as e:
         return f"ERROR: {e}"
 
-def parse_interface_status(output):
-    columns = ["Port", "Name", "Status", "Vlan", "Duplex", "Speed", "Type"]
-    data = []
-    lines = output.splitlines()
-    header_found = False
-    
-    # Find the header line to determine column positions
-    header_line = None
-    header_positions = {}
-    
-    for i, line in enumerate(lines):
-        if re.match(r"^Port\s+Name\s+Status\s+Vlan\s+Duplex\s+Speed\s+Type", line):
-            header_line = line
-            header_found = True
-            
-            # Find the starting position of each column in the header
-            current_pos = 0
-            for col in columns:
-                pos = header_line.find(col, current_pos)
-                if pos != -1:
-                    header_positions[col] = pos
-                    current_pos = pos + len(col)
-            
-            # Skip the header line
-            continue
-        
-        # Skip lines that consist entirely of dash characters
-        if re.match(r"^-+$", line):
-            continue
-            
-        # Process data lines if header has been found
-        if header_found:
-            # Skip empty lines but don't break the loop
-            if not line.strip():
-                continue
-                
-            # Break if we encounter a switch prompt
-            if re.match(r"^\S+#", line):
-                break
-            
-            # Parse the line based on column positions
-            if len(line) >= header_positions.get("Type", 0):
-                row_data = []
-                
-                # Extract Port (first column)
-                port = line[:header_positions["Name"]].strip()
-                row_data.append(port)
-                
-                # Extract Name (may be empty)
-                name_end = header_positions["Status"]
-                name = line[header_positions["Name"]:name_end].strip()
-                row_data.append(name)
-                
-                # Extract Status
-                status_end = header_positions["Vlan"]
-                status = line[header_positions["Status"]:status_end].strip()
-                row_data.append(status)
-                
-                # Extract Vlan
-                vlan_end = header_positions["Duplex"]
-                vlan = line[header_positions["Vlan"]:vlan_end].strip()
-                row_data.append(vlan)
-                
-                # Extract Duplex
-                duplex_end = header_positions["Speed"]
-                duplex = line[header_positions["Duplex"]:duplex_end].strip()
-                row_data.append(duplex)
-                
-                # Extract Speed
-                speed_end = header_positions["Type"]
-                speed = line[header_positions["Speed"]:speed_end].strip()
-                row_data.append(speed)
-                
-                # Extract Type (last column)
-                type_val = line[header_positions["Type"]:].strip()
-                row_data.append(type_val)
-                
-                data.append(row_data)
-    
-    return pd.DataFrame(data, columns=columns)
+def parse_interface_status(output, host=None):
+    # IOS/IOS-XE, NX-OS and EOS layouts are told apart by cli_parsers; passing
+    # the host lets later outputs from the same switch parsed in this process
+    # skip platform detection
+    _, columns, rows = parse_output("interface_status", output, host)
+    return pd.DataFrame(rows, columns=columns or INTERFACE_STATUS_COLUMNS)
 
+def parse_interface_sheet(switch, raw_output, stream=None):
+    # Turn raw output into the DataFrame written as the switch's sheet; rows
+    # already parsed by a stream fed during collection are used as they are
+    if raw_output.startswith("ERROR:"):
+        return pd.DataFrame([[raw_output]], columns=["Error"])
+    if stream is not None:
+        _, columns, rows = stream.close(raw_output)
+        df = pd.DataFrame(rows, columns=columns or INTERFACE_STATUS_COLUMNS)
+    else:
+        df = parse_interface_status(raw_output, switch)
+    if df.empty:
+        df = pd.DataFrame([["No data parsed"]], columns=["Info"])
+    return df
+
+def collect_interface_status(switch, username, password, structured=False):
+    # Collect and parse one switch, parsing the table while it is still arriving.
+    # A failed fetch returns its "ERROR: ..." output for the retry logic
+    stream = TableStream("interface_status", host=switch)
+    raw_output = get_interface_status_via_shell(switch, username, password, structured, stream)
+    if interface_output_error(raw_output):
+        return raw_output
+    return parse_interface_sheet(switch, raw_output, stream)
+
+def interface_output_error(raw_output):
+    # get_interface_status_via_shell reports SSH failures as an "ERROR: ..." string
+    if raw_output.startswith("ERROR:"):
+        return raw_output
+    return None
 
 def main():
     # Create int_parsed_outputs directory if it doesn't exist
@@ -124,8 +84,8 @@ def main():
         print(f"Created output directory: {output_dir}")
     
     # Initialize collections to store all switches and their credentials
-    all_switches = []
-    switch_credentials = {}
+    groups = []
+    group_credentials = {}
     csv_files = []
     
     # Get first CSV file and credentials
@@ -142,15 +102,24 @@ def main():
         print(f"Found {len(switches)} switches in {csv_file}.")
         
         # Store switches and their credentials
-        for switch in switches:
-            all_switches.append(switch)
-            switch_credentials[switch] = (username, password)
+        groups.append((csv_file, switches))
+        group_credentials[csv_file] = (username, password)
         
         # Ask if user has another CSV file with different credentials
         another = input("Do you have another CSV file with switches that use different credentials? (y/n): ").lower()
         if another != 'y':
             break
     
+    # A switch listed in several CSV files keeps the credentials of the first
+    all_switches, switch_group = dedupe_groups(groups)
+    switch_credentials = {switch: group_credentials[group] for switch, group in switch_group.items()}
+    
+    # NX-OS and EOS can return structured output, which needs no column slicing
+    structured = input("Request structured (| json) output where the switch supports it? (y/n): ").lower() == 'y'
+    
+    # Optional caps so one AAA server or site link is not flooded with logins
+    per_group, per_site = prompt_limits()
+    
     # Prepare output file name with timestamp to avoid overwriting existing files
     # Use the first CSV file for naming the output files
     base, ext = os.path.splitext(csv_files[0])
@@ -171,19 +140,29 @@ def main():
     print(f"Output will be saved to {excel_file}")
 
     with pd.ExcelWriter(excel_file, engine='xlsxwriter') as writer:
-        # Process each switch with its corresponding credentials
-        for switch in all_switches:
+        # Skip switches that failed repeatedly in previous runs
+        health = HostHealth()
+        to_poll, skipped = health.partition(all_switches)
+        for switch in skipped:
+            print(f"Skipping {switch}: {health.describe(switch)}")
+        
+        # Slowest switches first, CSV files interleaved, within the session caps
+        to_poll = schedule_hosts(to_poll, switch_group, health)
+        limits = ConcurrencyLimits(switch_group, per_group, per_site)
+        
+        def fetch(switch):
             username, password = switch_credentials[switch]
             print(f"Connecting to {switch}...")
-            raw_output = get_interface_status_via_shell(switch, username, password)
-            if raw_output.startswith("ERROR:"):
-                df = pd.DataFrame([[raw_output]], columns=["Error"])
-            else:
-                df = parse_interface_status(raw_output)
-                if df.empty:
-                    df = pd.DataFrame([["No data parsed"]], columns=["Info"])
-            sheet_name = str(switch)[:31]  # Excel sheet names limited to 31 chars
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
+            return collect_interface_status(switch, username, password, structured)
+        
+        def write(switch, df):
+            df.to_excel(writer, sheet_name=excel_sheet_name(switch), index=False)
+        
+        # SSH sessions and sheet writing run as overlapping stages, each table
+        # parsed while it arrives; failed switches are retried with backoff
+        # after the healthy ones
+        run_pipeline(to_poll, fetch, functools.partial(keep_sheet, parse_interface_sheet), write,
+                     functools.partial(sheet_error, interface_output_error), health, use_processes=False, limits=limits)
     print(f"Done! Output saved to {excel_file}")
 
 if __name__ == "__main__":
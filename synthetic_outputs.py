@@ -0,0 +1,146 @@
+import random
+
+# Column layouts copied from real IOS output so the position-based parsers see
+# the same offsets they would on a live switch
+INT_STATUS_WIDTHS = [("Port", 10), ("Name", 19), ("Status", 13), ("Vlan", 11), ("Duplex", 8), ("Speed", 7), ("Type", 0)]
+
+# Header variants handled by cdp_plotter.parse_cdp_output
+CDP_HEADER_VARIANTS = [
+    ("Device ID", "Local Intrfce", "Holdtme", "Capability", "Platform", "Port ID"),
+    ("Device-ID", "Local Intrfce", "Hldtme", "Capability", "Platform", "Port ID"),
+    ("Device Id", "Local Interface", "Hold Time", "Capability", "Platform", "Port Id"),
+]
+CDP_WIDTHS = [17, 18, 10, 11, 10, 0]
+
+CDP_LEGEND = """Capability Codes: R - Router, T - Trans Bridge, B - Source Route Bridge
+                  S - Switch, H - Host, I - IGMP, r - Repeater, P - Phone,
+                  D - Remote, C - CVTA, M - Two-port Mac Relay
+"""
+
+PORT_TYPES = [
+    ("a-1000", "10/100/1000BaseTX"),
+    ("a-1000", "10/100/1000BaseTX"),
+    ("a-100", "10/100/1000BaseTX"),
+    ("auto", "10/100/1000BaseTX"),
+    ("10G", "SFP-10GBase-SR"),
+    ("10G", "SFP-10GBase-LR"),
+    ("25G", "SFP-25GBase-SR"),
+    ("40G", "QSFP-40G-SR4"),
+    ("100G", "QSFP-100G-SR4"),
+]
+STATUSES = ["connected", "connected", "connected", "notconnect", "notconnect", "disabled", "err-disabled"]
+DESCRIPTIONS = ["", "", "", "Uplink to core", "AP", "Printer", "Server NIC1", "Phone", "po member", "Camera"]
+PLATFORMS = [("R S I", "WS-C3850-"), ("S I", "C9300-48P"), ("R S I", "N9K-C93180"), ("H P M", "IP Phone"), ("T B I", "AIR-AP2802")]
+DOMAIN = "example.net"
+
+
+def _fixed_width(values, widths):
+    """Lay out values into fixed-width columns, the last column unpadded."""
+    line = ""
+    for value, width in zip(values, widths):
+        if width:
+            line += value.ljust(width - 1)[:width - 1] + " "
+        else:
+            line += value
+    return line
+
+
+def interface_name(index, prefix="Gi"):
+    """Return a stack-style interface name such as Gi2/0/14 for a port index."""
+    member, port = divmod(index, 48)
+    return f"{prefix}{member + 1}/0/{port + 1}"
+
+
+def generate_interface_status(num_ports=48, hostname="sw1", seed=None):
+    """Synthesize 'show interface status' output for a switch with num_ports ports."""
+    rng = random.Random(seed)
+    widths = [width for _, width in INT_STATUS_WIDTHS]
+    lines = [f"{hostname}#show interface status", ""]
+    lines.append(_fixed_width([name for name, _ in INT_STATUS_WIDTHS], widths))
+    for i in range(num_ports):
+        speed, port_type = rng.choice(PORT_TYPES)
+        prefix = "Te" if speed in ("10G", "25G") else "Fo" if speed == "40G" else "Hu" if speed == "100G" else "Gi"
+        status = rng.choice(STATUSES)
+        vlan = rng.choice(["1", "10", "20", "trunk", "routed", str(rng.randint(2, 4094))])
+        duplex = "a-full" if status == "connected" else "auto"
+        lines.append(_fixed_width(
+            [interface_name(i, prefix), rng.choice(DESCRIPTIONS), status, vlan, duplex, speed, port_type],
+            widths,
+        ))
+    # Logical interfaces the active-port counter is expected to skip
+    for i in range(max(1, num_ports // 48)):
+        lines.append(_fixed_width([f"Po{i + 1}", "", "connected", "trunk", "a-full", "a-10G", ""], widths))
+    lines.append(_fixed_width(["Vlan1", "", "connected", "routed", "auto", "auto", ""], widths))
+    lines.append(f"{hostname}#")
+    return "\n".join(lines) + "\n"
+
+
+def generate_cdp_neighbors(neighbors, hostname="sw1", header_variant=0, wrap_ratio=0.75, seed=None):
+    """Synthesize 'show cdp neighbor' output.
+
+    neighbors is a list of (device_id, local_interface, capability, platform, port_id)
+    tuples. Device IDs longer than the first column are always wrapped onto their own
+    line; shorter ones are wrapped with probability wrap_ratio, like NX-OS does.
+    """
+    rng = random.Random(seed)
+    header = CDP_HEADER_VARIANTS[header_variant % len(CDP_HEADER_VARIANTS)]
+    lines = [f"{hostname}#show cdp neighbor", CDP_LEGEND]
+    lines.append(_fixed_width(header, CDP_WIDTHS))
+    indent = " " * CDP_WIDTHS[0]
+    for device_id, local_interface, capability, platform, port_id in neighbors:
+        fields = [local_interface, str(rng.randint(120, 179)), capability, platform, port_id]
+        if len(device_id) >= CDP_WIDTHS[0] - 1 or rng.random() < wrap_ratio:
+            lines.append(device_id)
+            lines.append(indent + _fixed_width(fields, CDP_WIDTHS[1:]))
+        else:
+            lines.append(_fixed_width([device_id] + fields, CDP_WIDTHS))
+    lines.append("")
+    lines.append(f"Total cdp entries displayed : {len(neighbors)}")
+    lines.append(f"{hostname}#")
+    return "\n".join(lines) + "\n"
+
+
+def generate_fleet(num_devices, fanout=8, parallel_ratio=0.2, seed=None):
+    """Build a tree-shaped fleet and return {hostname: [cdp neighbor tuples]}.
+
+    Every link is observed from both ends, and parallel_ratio of the uplinks are
+    two-member bundles, so the output exercises deduplication and port-channels.
+    """
+    rng = random.Random(seed)
+    hosts = [f"sw{i:05d}.{DOMAIN}" for i in range(num_devices)]
+    neighbors = {host: [] for host in hosts}
+    next_port = [0] * num_devices
+
+    for child in range(1, num_devices):
+        parent = (child - 1) // fanout
+        members = 2 if rng.random() < parallel_ratio else 1
+        capability, platform = rng.choice(PLATFORMS[:3])
+        for _ in range(members):
+            parent_if = interface_name(next_port[parent], "Ten ")
+            child_if = interface_name(next_port[child], "Ten ")
+            next_port[parent] += 1
+            next_port[child] += 1
+            # CDP shows the serial number after the hostname on some platforms
+            child_id = hosts[child] if rng.random() < 0.7 else f"{hosts[child]}(FDO{rng.randint(10000000, 99999999)})"
+            neighbors[hosts[parent]].append((child_id, parent_if, capability, platform, child_if))
+            neighbors[hosts[child]].append((hosts[parent], child_if, "R S I", "N9K-C93180", parent_if))
+
+    # Edge devices that are never polled themselves (phones, APs)
+    for i, host in enumerate(hosts):
+        for j in range(rng.randint(0, 3)):
+            capability, platform = rng.choice(PLATFORMS[3:])
+            neighbors[host].append((f"SEP{i:06d}{j:02d}", interface_name(next_port[i] + 24, "Gig "), capability, platform, "Port 1"))
+    return neighbors
+
+
+def generate_fleet_outputs(num_devices, port_counts=(48, 48, 48, 96, 192, 384), seed=None):
+    """Return ({host: int status text}, {host: cdp neighbor text}) for a synthetic fleet."""
+    rng = random.Random(seed)
+    fleet = generate_fleet(num_devices, seed=seed)
+    int_outputs = {}
+    cdp_outputs = {}
+    for i, (host, neighbors) in enumerate(fleet.items()):
+        short = host.split(".")[0]
+        int_outputs[host] = generate_interface_status(rng.choice(port_counts), short, seed=rng.random())
+        cdp_outputs[host] = generate_cdp_neighbors(neighbors, short, header_variant=i, seed=rng.random())
+    return int_outputs, cdp_outputs
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from active_ports_speed_type_counter import aggregate_workbooks, compile_rules, count_active_ports
+
+
+@pytest.mark.parametrize("rule", [
+    {"action": "include", "values": ["connected"]},
+    {"column": "Status", "regex": "conn(ected"},
+    {"column": "Status", "action": "keep", "values": ["connected"]},
+    {"column": "Status"},
+])
+def test_malformed_rules_raise_value_error(rule):
+    with pytest.raises(ValueError):
+        compile_rules([rule])
+
+
+def test_rules_match_case_insensitively():
+    mask = compile_rules([
+        {"action": "include", "column": "Status", "values": ["Connected"]},
+        {"action": "exclude", "column": "Port", "prefix": ["po"]},
+        {"action": "exclude", "column": "Speed", "regex": "^AUTO$"},
+    ])
+    df = pd.DataFrame({"Port": ["Gi1/0/1", "Po1", "Gi1/0/2", "Gi1/0/3"],
+                       "Status": ["connected", "connected", "notconnect", " CONNECTED "],
+                       "Speed": ["a-1000", "a-10G", "auto", "auto"]})
+    assert mask(df).tolist() == [True, False, False, False]
+    assert mask.columns == {"Status", "Port", "Speed"}
+
+
+def test_count_active_ports_skips_error_sheets():
+    sheets = {
+        "sw1": pd.DataFrame({"Port": ["Gi1/0/1", "Gi1/0/2", "Te1/1/1"], "Status": ["connected"] * 3,
+                             "Speed": ["a-1000", "a-1000", "10G"], "Type": ["T", "T", "SR"]}),
+        "sw2": pd.DataFrame([["ERROR: timed out"]], columns=["Error"]),
+    }
+    reports = count_active_ports(sheets, reports={"Speed Summary": ["Speed"]})
+    report = reports["Speed Summary"]
+    assert report.to_dict("records") == [{"Switch": "sw1", "Speed": "a-1000", "Count": 2},
+                                         {"Switch": "sw1", "Speed": "10G", "Count": 1}]
+
+
+def test_aggregate_counts_only_workbooks_read(tmp_path, capsys):
+    good = tmp_path / "site1_show_int_status_parsed_20250517.xlsx"
+    pd.DataFrame({"Port": ["Gi1/0/1"], "Status": ["connected"], "Speed": ["a-1000"], "Type": ["T"]}).to_excel(
+        good, sheet_name="sw1", index=False)
+    broken = tmp_path / "site2_show_int_status_parsed_20250517.xlsx"
+    broken.write_text("not a workbook")
+    cache_file = str(tmp_path / "cache.json")
+    sheets = aggregate_workbooks([str(good), str(broken)], cache_file=cache_file, workers=1)
+    out = capsys.readouterr().out
+    assert "Read 1 workbooks, 0 unchanged since the last run, 1 could not be read" in out
+    assert sheets
+    aggregate_workbooks([str(good)], cache_file=cache_file, workers=1)
+    assert "Read 0 workbooks, 1 unchanged since the last run" in capsys.readouterr().out
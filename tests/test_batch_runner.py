@@ -0,0 +1,59 @@
+import json
+import sys
+
+import pytest
+
+import batch_runner
+
+
+def write_config(tmp_path, **overrides):
+    (tmp_path / "inventory.csv").write_text("sw1\nsw2\n")
+    config = {"tasks": ["interfaces"], "formats": ["csv"], "health_file": str(tmp_path / "health.json"),
+              "inventory": [{"csv": str(tmp_path / "inventory.csv"), "username": "admin", "password": "admin"}]}
+    config.update(overrides)
+    config_file = tmp_path / "batch.json"
+    config_file.write_text(json.dumps(config))
+    return str(config_file)
+
+
+def test_daemon_survives_failed_cycle(tmp_path, monkeypatch, capsys):
+    config_file = write_config(tmp_path)
+    calls = []
+
+    def run_cycle(config, inventory, state, health, coordinator=None):
+        state.cycles += 1
+        calls.append(state.cycles)
+        if state.cycles == 1:
+            raise OSError("disk full")
+
+    monkeypatch.setattr(batch_runner, "run_cycle", run_cycle)
+    monkeypatch.setattr(batch_runner.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(sys, "argv", ["batch_runner.py", config_file, "--daemon", "--cycles", "3"])
+    assert batch_runner.main() == 0
+    assert calls == [1, 2, 3]
+    assert "Cycle 1 failed: OSError: disk full" in capsys.readouterr().out
+
+
+def test_single_run_reraises_cycle_errors(tmp_path, monkeypatch):
+    config_file = write_config(tmp_path)
+
+    def run_cycle(config, inventory, state, health, coordinator=None):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(batch_runner, "run_cycle", run_cycle)
+    monkeypatch.setattr(sys, "argv", ["batch_runner.py", config_file])
+    with pytest.raises(OSError):
+        batch_runner.main()
+
+
+def test_bad_count_rule_is_a_config_error(tmp_path, monkeypatch, capsys):
+    config_file = write_config(tmp_path, count={"rules": [{"action": "include", "values": ["connected"]}]})
+    monkeypatch.setattr(sys, "argv", ["batch_runner.py", config_file])
+    assert batch_runner.main() == 1
+    assert "Error loading config" in capsys.readouterr().out
+
+
+def test_session_caps_below_one_are_rejected(tmp_path):
+    config_file = write_config(tmp_path, limits={"per_group": 0})
+    with pytest.raises(ValueError):
+        batch_runner.load_config(config_file)
@@ -0,0 +1,29 @@
+import pandas as pd
+
+from cdp_plotter import build_topology_graph, unique_connections
+
+
+def neighbors(rows):
+    return pd.DataFrame(rows, columns=["source_switch", "device_id", "local_interface", "holdtime", "capability",
+                                       "platform", "port_id"])
+
+
+LINKS = neighbors([
+    ["sw1", "sw2", "Gi1/0/1", "150", "R S", "C9300", "Gi1/0/49"],
+    ["sw2", "sw1", "GigabitEthernet1/0/49", "150", "R S", "C9300", "Gig 1/0/1"],
+    ["sw1", "sw2", "Gi1/0/2", "150", "R S", "C9300", "Gi1/0/50"],
+    ["sw1", "phone1", "Gi1/0/3", "150", "H P", "IP Phone", "Port 1"],
+])
+
+
+def test_links_seen_from_both_ends_are_listed_once():
+    assert unique_connections(LINKS).index.tolist() == [0, 1, 2]
+    assert unique_connections(LINKS)["device_id"].tolist() == ["sw2", "sw2", "phone1"]
+
+
+def test_parallel_links_share_one_edge():
+    G = build_topology_graph(LINKS)
+    assert G.number_of_edges() == 2
+    assert G.edges["sw1", "sw2"]["links"] == 2
+    assert G.edges["sw1", "sw2"]["label"] == "2 links"
+    assert G.nodes["phone1"]["device_type"] == "other"
@@ -0,0 +1,111 @@
+import json
+import random
+
+import pytest
+
+import synthetic_outputs
+from cli_parsers import INTERFACE_STATUS_COLUMNS, TableStream, _eos_speed, detect_platform, parse_output
+
+IOS_STATUS = """sw1#show interface status
+
+Port      Name               Status       Vlan       Duplex  Speed Type
+Gi1/0/1   uplink             connected    trunk      a-full  a-1000 10/100/1000BaseTX
+Gi1/0/2                      notconnect   1          auto    auto  10/100/1000BaseTX
+sw1#"""
+
+IOS_STATUS_EXTRA_COLUMN = """sw1#show interface status
+
+Port      Name               Status       Vlan       Duplex  Speed Type               Mode
+Gi1/0/1   uplink             connected    trunk      a-full  a-1000 10/100/1000BaseTX  access
+Gi1/0/2                      notconnect   1          auto    auto  10/100/1000BaseTX  access
+sw1#"""
+
+IOS_CDP = """sw1#show cdp neighbor
+Capability Codes: R - Router, T - Trans Bridge, B - Source Route Bridge
+                  S - Switch, H - Host, I - IGMP, r - Repeater, P - Phone
+
+Device ID        Local Intrfce     Holdtme    Capability  Platform  Port ID
+a-very-long-distribution-switch.example.com
+                 Gig 1/0/1         150             R S I  WS-C3850  Gig 1/0/48
+core1            Ten 1/1/1         170             R S I  N9K-C9300 Eth 1/1
+sw1#"""
+
+
+def test_ios_interface_status():
+    platform, columns, rows = parse_output("interface_status", IOS_STATUS)
+    assert platform == "ios"
+    assert columns == INTERFACE_STATUS_COLUMNS
+    assert rows == [["Gi1/0/1", "uplink", "connected", "trunk", "a-full", "a-1000", "10/100/1000BaseTX"],
+                    ["Gi1/0/2", "", "notconnect", "1", "auto", "auto", "10/100/1000BaseTX"]]
+
+
+def test_trailing_header_columns_are_ignored():
+    _, columns, rows = parse_output("interface_status", IOS_STATUS_EXTRA_COLUMN)
+    assert columns == INTERFACE_STATUS_COLUMNS
+    assert [row[0] for row in rows] == ["Gi1/0/1", "Gi1/0/2"]
+    assert rows[0][-1] == "10/100/1000BaseTX"
+
+
+def test_wrapped_cdp_device_id():
+    _, columns, rows = parse_output("neighbors", IOS_CDP)
+    by_column = [dict(zip(columns, row)) for row in rows]
+    assert [row["device_id"] for row in by_column] == ["a-very-long-distribution-switch.example.com", "core1"]
+    assert by_column[0]["local_interface"] == "Gig 1/0/1"
+    assert by_column[0]["port_id"] == "Gig 1/0/48"
+    assert by_column[1]["platform"] == "N9K-C9300"
+
+
+def test_synthetic_interface_status_rows():
+    output = synthetic_outputs.generate_interface_status(96, seed=1)
+    _, columns, rows = parse_output("interface_status", output)
+    assert columns == INTERFACE_STATUS_COLUMNS
+    # 96 physical ports plus the port-channel and SVI rows the generator adds
+    assert sum(1 for row in rows if row[0].startswith(("Gi", "Te", "Fo", "Hu"))) == 96
+
+
+def test_detect_platform():
+    assert detect_platform(IOS_STATUS) == "ios"
+    assert detect_platform("Cisco Nexus Operating System (NX-OS) Software") == "nxos"
+    assert detect_platform(json.dumps({"interfaceStatuses": {}})) == "eos"
+
+
+def test_nxos_json_interface_status():
+    document = {"TABLE_interface": {"ROW_interface": [
+        {"interface": "Ethernet1/1", "name": "uplink", "state": "connected", "vlan": "trunk",
+         "duplex": "full", "speed": "10G", "type": "10Gbase-SR"}]}}
+    output = "sw1# show interface status | json\n" + json.dumps(document) + "\nsw1#"
+    platform, columns, rows = parse_output("interface_status", output)
+    assert platform == "nxos"
+    assert dict(zip(columns, rows[0])) == {"Port": "Ethernet1/1", "Name": "uplink", "Status": "connected",
+                                           "Vlan": "trunk", "Duplex": "full", "Speed": "10G",
+                                           "Type": "10Gbase-SR"}
+
+
+@pytest.mark.parametrize("status, speed", [
+    ({"bandwidth": 2500000000, "autoNegotiateActive": True}, "a-2.5G"),
+    ({"bandwidth": 25000000000}, "25G"),
+    ({"bandwidth": 100000000000}, "100G"),
+    ({"bandwidth": 1000000000, "autoNegotiateActive": True}, "a-1G"),
+    ({"bandwidth": 100000000}, "100M"),
+    ({"bandwidth": 0, "autoNegotiateActive": True}, "auto"),
+])
+def test_eos_speed(status, speed):
+    assert _eos_speed(status) == speed
+
+
+@pytest.mark.parametrize("command, output", [
+    ("interface_status", IOS_STATUS),
+    ("interface_status", IOS_STATUS_EXTRA_COLUMN),
+    ("neighbors", IOS_CDP),
+    ("interface_status", synthetic_outputs.generate_interface_status(48, seed=2)),
+])
+def test_table_stream_matches_parse_output(command, output):
+    rng = random.Random(0)
+    data = output.encode()
+    stream = TableStream(command)
+    position = 0
+    while position < len(data):
+        size = rng.randint(1, 64)
+        stream.feed(data[position:position + size])
+        position += size
+    assert stream.close(output) == parse_output(command, output)
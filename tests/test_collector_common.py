@@ -0,0 +1,46 @@
+import collector_common
+from cli_parsers import TableStream
+from collector_common import excel_sheet_name, run_command, split_host_port
+
+
+def test_split_host_port():
+    assert split_host_port("sw1") == ("sw1", 22)
+    assert split_host_port("127.0.0.1:2222") == ("127.0.0.1", 2222)
+    assert split_host_port("2001:db8::1") == ("2001:db8::1", 22)
+    assert split_host_port("sw1:ssh") == ("sw1:ssh", 22)
+
+
+def test_excel_sheet_name():
+    assert excel_sheet_name("2001:db8::1") == "2001_db8__1"
+    assert excel_sheet_name("a/b[c]*?\\d") == "a_b_c____d"
+    assert len(excel_sheet_name("x" * 40)) == 31
+
+
+class FakeShell:
+    """Answers every command with the same output, in fixed-size chunks."""
+
+    def __init__(self, output, chunk_size=7):
+        self.output = output.encode()
+        self.chunk_size = chunk_size
+        self.pending = b""
+        self.sent = []
+
+    def send(self, data):
+        self.sent.append(data)
+        self.pending = self.output
+
+    def recv_ready(self):
+        return bool(self.pending)
+
+    def recv(self, size):
+        data, self.pending = self.pending[:self.chunk_size], self.pending[self.chunk_size:]
+        return data
+
+
+def test_run_command_reads_and_streams(monkeypatch):
+    monkeypatch.setattr(collector_common.time, "sleep", lambda seconds: None)
+    output = "Port      Name  Status\nsw1#"
+    shell = FakeShell(output)
+    stream = TableStream("interface_status")
+    assert run_command(shell, "show interface status", stream, wait=0, quiet=0) == output
+    assert shell.sent == ["show interface status\n"]
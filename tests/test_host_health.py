@@ -0,0 +1,77 @@
+import json
+
+import batch_runner
+from host_health import HostHealth, collect_with_retries
+
+DEAD_SWITCH = "127.0.0.1:1"
+
+
+def test_failures_count_once_per_run():
+    health = HostHealth(None, failure_threshold=3)
+    health.start_run()
+    health.record_failure("sw1", "ERROR: timed out")
+    health.record_failure("sw1", "ERROR: timed out")
+    assert health.hosts["sw1"]["failures"] == 1
+    health.start_run()
+    health.record_failure("sw1", "ERROR: timed out")
+    assert health.hosts["sw1"]["failures"] == 2
+    assert not health.is_open("sw1")
+    health.start_run()
+    health.record_failure("sw1", "ERROR: timed out")
+    assert health.is_open("sw1")
+
+
+def test_success_closes_circuit():
+    health = HostHealth(None, failure_threshold=1)
+    health.record_failure("sw1", "ERROR: refused")
+    assert health.is_open("sw1")
+    health.record_success("sw1", 1.0)
+    assert not health.is_open("sw1")
+    assert health.hosts["sw1"]["failures"] == 0
+
+
+def test_retries_then_records_failure():
+    health = HostHealth(None, max_attempts=3, base_delay=0, max_delay=0)
+    calls = []
+
+    def collect(host):
+        calls.append(host)
+        return "ERROR: refused"
+
+    results = list(collect_with_retries(["sw1"], collect, lambda raw: raw if raw.startswith("ERROR:") else None,
+                                        health))
+    assert results == [("sw1", "ERROR: refused")]
+    assert calls == ["sw1"] * 3
+    assert health.hosts["sw1"]["failures"] == 1
+
+
+def test_authentication_failures_are_not_retried():
+    health = HostHealth(None, max_attempts=3, base_delay=0, max_delay=0)
+    calls = []
+
+    def collect(host):
+        calls.append(host)
+        return "ERROR: Authentication failed."
+
+    list(collect_with_retries(["sw1"], collect, lambda raw: raw, health))
+    assert calls == ["sw1"]
+
+
+def test_cycle_counts_one_failure_for_dead_switch(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "inventory.csv").write_text(f"{DEAD_SWITCH}\n")
+    config_file = tmp_path / "batch.json"
+    config_file.write_text(json.dumps({
+        "tasks": ["interfaces", "cdp"], "formats": ["csv"], "health_file": "health.json",
+        "retry": {"max_attempts": 1},
+        "inventory": [{"csv": "inventory.csv", "username": "admin", "password": "admin"}],
+    }))
+    config = batch_runner.load_config(str(config_file))
+    inventory = batch_runner.build_inventory(config)
+    health = HostHealth(config["health_file"], **config["retry"])
+    batch_runner.run_cycle(config, inventory, batch_runner.PollState(), health)
+    with open(tmp_path / "health.json") as f:
+        assert json.load(f)[DEAD_SWITCH]["failures"] == 1
+    batch_runner.run_cycle(config, inventory, batch_runner.PollState(), health)
+    assert health.hosts[DEAD_SWITCH]["failures"] == 2
+    assert not health.is_open(DEAD_SWITCH)
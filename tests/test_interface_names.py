@@ -0,0 +1,23 @@
+import pytest
+
+from interface_names import canonical_interface, interface_key
+
+
+@pytest.mark.parametrize("name, short", [
+    ("GigabitEthernet1/0/1", "Gi1/0/1"),
+    ("Gig 1/0/1", "Gi1/0/1"),
+    ("Gigabit1/0/1", "Gi1/0/1"),
+    ("TenGig1/1/1", "Te1/1/1"),
+    ("TwentyFiveGigE1/0/1", "Twe1/0/1"),
+    ("Eth 1/1", "Eth1/1"),
+    ("Port-channel10", "Po10"),
+    ("Port 1", "Port1"),
+    ("eth0", "Eth0"),
+])
+def test_canonical_interface(name, short):
+    assert canonical_interface(name) == short
+
+
+def test_interface_key_ignores_case_and_spacing():
+    assert interface_key("gigabitethernet 1/0/1") == interface_key("Gi1/0/1")
+    assert interface_key("Te1/0/1") != interface_key("Tw1/0/1")
@@ -0,0 +1,33 @@
+import pytest
+
+from host_health import HostHealth
+from pipeline import run_pipeline
+
+
+def fetch(host):
+    return "ERROR: unreachable" if host == "down" else f"output of {host}"
+
+
+def error_of(raw):
+    return raw if raw.startswith("ERROR:") else None
+
+
+def parse(host, raw):
+    return raw.upper()
+
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_every_host_is_written_once(use_processes):
+    written = {}
+    health = HostHealth(None, max_attempts=1)
+    run_pipeline(["sw1", "sw2", "down"], fetch, parse, written.__setitem__, error_of, health,
+                 network_workers=2, use_processes=use_processes)
+    assert written == {"sw1": "OUTPUT OF SW1", "sw2": "OUTPUT OF SW2", "down": "ERROR: UNREACHABLE"}
+
+
+def test_stage_errors_are_reraised():
+    def write(host, result):
+        raise OSError("disk full")
+
+    with pytest.raises(OSError, match="disk full"):
+        run_pipeline(["sw1", "sw2"], fetch, parse, write, error_of, HostHealth(None), use_processes=False)
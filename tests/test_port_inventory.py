@@ -0,0 +1,33 @@
+import pandas as pd
+
+from port_inventory import join_ports
+
+
+def neighbors(rows):
+    return pd.DataFrame(rows, columns=["source_switch", "device_id", "local_interface", "holdtime", "capability",
+                                       "platform", "port_id"])
+
+
+def test_join_matches_abbreviated_names_and_aggregates():
+    interfaces = {"sw1": pd.DataFrame({"Port": ["Gi1/0/1", "Gi1/0/2"], "Status": ["connected", "connected"]})}
+    cdp = neighbors([
+        ["sw1", "core1", "Gig 1/0/1", "150", "R S", "N9K", "Eth 1/1"],
+        ["sw1", "phone1", "GigabitEthernet1/0/2", "150", "H P", "IP Phone", "Port 1"],
+        ["sw1", "pc1", "Gi1/0/2", "150", "H", "Linux", "eth0"],
+    ])
+    ports, unmatched = join_ports(interfaces, cdp)
+    assert ports["Neighbors"].tolist() == [1, 2]
+    assert unmatched.empty
+
+
+def test_neighbors_with_missing_keys_are_kept():
+    interfaces = {"sw1": pd.DataFrame({"Port": ["Gi1/0/1"], "Status": ["connected"]})}
+    cdp = neighbors([
+        ["sw1", "core1", "Gi1/0/1", "150", "R S", "N9K", "Eth 1/1"],
+        ["sw1", "ap1", None, "150", "T", "AIR", "Gi0"],
+        ["sw1", "ap2", None, "150", "T", "AIR", "Gi0"],
+    ])
+    ports, unmatched = join_ports(interfaces, cdp)
+    assert ports["Neighbors"].tolist() == [1]
+    assert len(unmatched) == 1
+    assert set(unmatched.iloc[0].astype(str)) >= {"ap1, ap2"}
@@ -0,0 +1,72 @@
+import pytest
+
+from host_health import HostHealth
+from scheduler import (ConcurrencyLimits, dedupe_groups, parse_limits, prompt_limits, schedule_hosts, site_key,
+                       split_limits)
+
+
+def test_site_key():
+    assert site_key("10.1.2.3") == "10.1.2.0/24"
+    assert site_key("10.1.2.3:2222") == "10.1.2.0/24"
+    assert site_key("bldg7-sw01.example.com") == "bldg7"
+    assert site_key("NYC01") == "nyc"
+
+
+def test_dedupe_ignores_case_and_whitespace():
+    hosts, group_of = dedupe_groups([("a", ["SW1", "sw2"]), ("b", [" sw1 ", "sw3"])])
+    assert hosts == ["SW1", "sw2", "sw3"]
+    assert group_of == {"SW1": "a", "sw2": "a", "sw3": "b"}
+
+
+def test_schedule_interleaves_groups_within_latency_band():
+    health = HostHealth(None)
+    latencies = {"a1": 5.0, "a2": 5.1, "a3": 5.2, "b1": 5.05, "b2": 5.15, "slow": 30.0}
+    health.hosts = {host: {"latency": latency} for host, latency in latencies.items()}
+    group_of = {"a1": "a", "a2": "a", "a3": "a", "b1": "b", "b2": "b", "slow": "b"}
+    order = schedule_hosts(["a1", "a2", "a3", "b1", "b2", "slow"], group_of, health)
+    assert order[0] == "slow"
+    groups = [group_of[host] for host in order[1:5]]
+    assert all(first != second for first, second in zip(groups, groups[1:]))
+
+
+@pytest.mark.parametrize("text, expected", [("", (None, None)), ("4,2", (4, 2)), ("4", (4, None)),
+                                            (",2", (None, 2))])
+def test_parse_limits(text, expected):
+    assert parse_limits(text) == expected
+
+
+@pytest.mark.parametrize("text", ["a,2", "0", "-1", "2.5", "1,2,3"])
+def test_parse_limits_rejects_bad_input(text):
+    with pytest.raises(ValueError):
+        parse_limits(text)
+
+
+def test_prompt_limits_asks_again(monkeypatch, capsys):
+    answers = iter(["a,2", "0", "3,1"])
+    monkeypatch.setattr("builtins.input", lambda prompt: next(answers))
+    assert prompt_limits() == (3, 1)
+    assert capsys.readouterr().out.count("whole number") == 2
+
+
+def test_concurrency_limits():
+    limits = ConcurrencyLimits({"sw1": "a", "sw2": "a", "sw3": "b"}, per_group=1, site_of={"sw3": "dc2"},
+                               group_limits={"b": 2})
+    assert limits.allows("sw1")
+    limits.acquire("sw1")
+    assert not limits.allows("sw2")
+    assert limits.allows("sw3")
+    limits.release("sw1")
+    assert limits.allows("sw2")
+    with pytest.raises(ValueError):
+        ConcurrencyLimits({}, per_site=0)
+
+
+def test_split_limits_shares_caps_between_shards():
+    group_of = {f"10.0.0.{i}": "a" for i in range(6)}
+    limits = ConcurrencyLimits(group_of, per_group=3, per_site=2)
+    hosts = list(group_of)
+    caps = split_limits(limits, [hosts[:3], hosts[3:]])
+    assert [group_caps["a"] for group_caps, _ in caps] == [2, 1]
+    assert [site_caps["10.0.0.0/24"] for _, site_caps in caps] == [1, 1]
+    with pytest.raises(ValueError):
+        split_limits(limits, [hosts[:2], hosts[2:4], hosts[4:]])
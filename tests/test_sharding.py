@@ -0,0 +1,58 @@
+import os
+import time
+
+from sharding import ShardCoordinator, run_worker, split_shards
+
+
+def handle(shard):
+    if shard == "die":
+        os._exit(1)
+    if shard == "slow":
+        time.sleep(5)
+    return {"ok": shard}
+
+
+def worker(address, authkey):
+    run_worker(address, authkey, handle)
+
+
+def test_split_shards_by_region_and_hash():
+    hosts = [("sw1", "east"), ("sw2", "west"), ("sw3", "east")]
+    assert split_shards(hosts, 4, "region") == [["sw1", "sw3"], ["sw2"]]
+    shards = split_shards(hosts, 2, "hash")
+    assert sorted(host for shard in shards for host in shard) == ["sw1", "sw2", "sw3"]
+    assert shards == split_shards(hosts, 2, "hash")
+
+
+def test_shard_nobody_takes_times_out():
+    coordinator = ShardCoordinator()
+    try:
+        start = time.monotonic()
+        assert coordinator.run(["a"], poll=0.2, timeout=1) == [
+            {"error": "no worker took the shard within 1 seconds"}]
+        assert time.monotonic() - start < 5
+    finally:
+        coordinator.close()
+
+
+def test_dead_and_slow_workers_fail_their_shards():
+    coordinator = ShardCoordinator(local_workers=3, worker=worker)
+    try:
+        results = coordinator.run(["a", "die", "slow", "b"], poll=0.2, timeout=2)
+        assert results[0] == {"ok": "a"} and results[3] == {"ok": "b"}
+        assert results[1]["error"].endswith("exited")
+        assert "did not finish within 2 seconds" in results[2]["error"]
+        # The late answer of the slow shard does not leak into the next run
+        assert coordinator.run(["c", "d"], poll=0.2, timeout=30) == [{"ok": "c"}, {"ok": "d"}]
+    finally:
+        coordinator.close(timeout=2)
+
+
+def test_exited_local_workers_fail_remaining_shards_and_restart():
+    coordinator = ShardCoordinator(local_workers=1, worker=worker)
+    try:
+        results = coordinator.run(["die", "a"], poll=0.2, timeout=30)
+        assert all("error" in result for result in results)
+        assert coordinator.run(["b"], poll=0.2, timeout=30) == [{"ok": "b"}]
+    finally:
+        coordinator.close(timeout=2)
@@ -0,0 +1,164 @@
+import json
+import networkx as nx
+import pandas as pd
+
+# Above this many nodes betweenness centrality is estimated from sampled sources
+DEFAULT_EXACT_LIMIT = 1000
+DEFAULT_SAMPLE_SIZE = 64
+DEFAULT_TOP = 50
+
+
+def resolve_device(G, name):
+    """Find the node matching a device name, exactly, case-insensitively or by unique prefix."""
+    if name in G:
+        return name
+    lower = name.lower()
+    matches = [node for node in G if str(node).lower() == lower]
+    if not matches:
+        matches = [node for node in G if str(node).lower().startswith(lower)]
+    if len(matches) == 1:
+        return matches[0]
+    return None
+
+
+def articulation_points(G):
+    """Devices whose loss splits the network, with the number of biconnected blocks each joins."""
+    blocks_per_node = {}
+    for block in nx.biconnected_components(G):
+        for node in block:
+            blocks_per_node[node] = blocks_per_node.get(node, 0) + 1
+    rows = [
+        {'Device': node, 'Device Type': G.nodes[node].get('device_type', 'other'),
+         'Degree': G.degree(node), 'Blocks Joined': blocks_per_node.get(node, 0)}
+        for node in nx.articulation_points(G)
+    ]
+    df = pd.DataFrame(rows, columns=['Device', 'Device Type', 'Degree', 'Blocks Joined'])
+    return df.sort_values(['Blocks Joined', 'Degree'], ascending=False, ignore_index=True)
+
+
+def bridges(G):
+    """Links whose loss splits the network; leaf links only cut off a single device."""
+    rows = []
+    for u, v in nx.bridges(G):
+        data = G.edges[u, v]
+        if data.get('local_device', u) != u:
+            u, v = v, u
+        rows.append({
+            'Device A': u,
+            'Device B': v,
+            'Local Interface': data.get('local_interface', ''),
+            'Port ID': data.get('port_id', ''),
+            'Links': data.get('links', 1),
+            'Leaf Link': G.degree(u) == 1 or G.degree(v) == 1,
+        })
+    df = pd.DataFrame(rows, columns=['Device A', 'Device B', 'Local Interface', 'Port ID', 'Links', 'Leaf Link'])
+    return df.sort_values(['Leaf Link', 'Device A'], ignore_index=True)
+
+
+def components(G):
+    """Connected components, largest first, with a few member names each."""
+    rows = []
+    for i, members in enumerate(sorted(nx.connected_components(G), key=len, reverse=True), start=1):
+        switches = sum(1 for node in members if G.nodes[node].get('device_type') in ('switch', 'router'))
+        rows.append({
+            'Component': i,
+            'Devices': len(members),
+            'Switches/Routers': switches,
+            'Sample Members': ', '.join(sorted(map(str, members))[:5]),
+        })
+    return pd.DataFrame(rows, columns=['Component', 'Devices', 'Switches/Routers', 'Sample Members'])
+
+
+def degree_ranking(G, top=DEFAULT_TOP):
+    """Devices with the most neighbors."""
+    ranked = sorted(G.degree, key=lambda item: item[1], reverse=True)[:top]
+    rows = [{'Device': node, 'Device Type': G.nodes[node].get('device_type', 'other'), 'Degree': degree}
+            for node, degree in ranked]
+    return pd.DataFrame(rows, columns=['Device', 'Device Type', 'Degree'])
+
+
+def betweenness_ranking(G, top=DEFAULT_TOP, exact_limit=DEFAULT_EXACT_LIMIT, sample_size=DEFAULT_SAMPLE_SIZE, seed=42):
+    """Devices carrying the most shortest paths.
+
+    Exact betweenness is O(nodes * edges), so above exact_limit nodes it is
+    estimated from sample_size random source nodes instead.
+    """
+    approximate = G.number_of_nodes() > exact_limit
+    k = min(sample_size, G.number_of_nodes()) if approximate else None
+    centrality = nx.betweenness_centrality(G, k=k, seed=seed if approximate else None)
+    ranked = sorted(centrality.items(), key=lambda item: item[1], reverse=True)[:top]
+    rows = [{'Device': node, 'Device Type': G.nodes[node].get('device_type', 'other'),
+             'Betweenness': round(value, 6), 'Approximate': approximate}
+            for node, value in ranked]
+    return pd.DataFrame(rows, columns=['Device', 'Device Type', 'Betweenness', 'Approximate'])
+
+
+def shortest_paths(G, pairs):
+    """Shortest path between each (source, target) pair of device names."""
+    rows = []
+    for source_name, target_name in pairs:
+        source = resolve_device(G, source_name)
+        target = resolve_device(G, target_name)
+        row = {'From': source_name, 'To': target_name, 'Hops': None, 'Path': ''}
+        if source is None or target is None:
+            missing = source_name if source is None else target_name
+            row['Path'] = f"Device not found or ambiguous: {missing}"
+        else:
+            try:
+                path = nx.shortest_path(G, source, target)
+                row['Hops'] = len(path) - 1
+                row['Path'] = ' -> '.join(map(str, path))
+            except nx.NetworkXNoPath:
+                row['Path'] = "No path"
+        rows.append(row)
+    return pd.DataFrame(rows, columns=['From', 'To', 'Hops', 'Path'])
+
+
+def analyze_topology(G, pairs=None, top=DEFAULT_TOP, exact_limit=DEFAULT_EXACT_LIMIT,
+                     sample_size=DEFAULT_SAMPLE_SIZE, seed=42):
+    """Run all analyses over the CDP topology graph and return {sheet name: DataFrame}."""
+    results = {
+        'Summary': pd.DataFrame([
+            {'Metric': 'Devices', 'Value': G.number_of_nodes()},
+            {'Metric': 'Device Pairs', 'Value': G.number_of_edges()},
+            {'Metric': 'Links', 'Value': sum(links for _, _, links in G.edges(data='links', default=1))},
+            {'Metric': 'Connected Components', 'Value': nx.number_connected_components(G)},
+        ]),
+        'Articulation_Points': articulation_points(G),
+        'Bridges': bridges(G),
+        'Components': components(G),
+        'Degree_Ranking': degree_ranking(G, top),
+        'Betweenness_Ranking': betweenness_ranking(G, top, exact_limit, sample_size, seed),
+    }
+    summary_extra = [
+        {'Metric': 'Articulation Points', 'Value': len(results['Articulation_Points'])},
+        {'Metric': 'Bridges', 'Value': len(results['Bridges'])},
+        {'Metric': 'Non-leaf Bridges', 'Value': int((~results['Bridges']['Leaf Link'].astype(bool)).sum())},
+    ]
+    results['Summary'] = pd.concat([results['Summary'], pd.DataFrame(summary_extra)], ignore_index=True)
+    if pairs:
+        results['Shortest_Paths'] = shortest_paths(G, pairs)
+    return results
+
+
+def write_analytics_sheets(results, writer, prefix='Topo_'):
+    """Write the analysis results as sheets of an open pandas ExcelWriter."""
+    for name, df in results.items():
+        df.to_excel(writer, sheet_name=f"{prefix}{name}"[:31], index=False)
+
+
+def write_analytics_json(results, json_file):
+    """Write the analysis results to a JSON file, one list of records per analysis."""
+    payload = {name: json.loads(df.to_json(orient='records')) for name, df in results.items()}
+    with open(json_file, 'w') as f:
+        json.dump(payload, f, indent=2)
+
+
+def parse_device_pairs(text):
+    """Parse 'a,b; c,d' into [('a', 'b'), ('c', 'd')]."""
+    pairs = []
+    for chunk in text.split(';'):
+        names = [name.strip() for name in chunk.split(',')]
+        if len(names) == 2 and all(names):
+            pairs.append((names[0], names[1]))
+    return pairs